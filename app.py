@@ -5,28 +5,1743 @@ This is a demonstration version with no API dependencies
 All data is from a sample SQLite database
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import (Blueprint, Flask, Response, current_app, g, jsonify, make_response,
+                   render_template, request, stream_with_context)
+from werkzeug.local import LocalProxy
 import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeout
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from itertools import accumulate, chain, count, islice, takewhile
+from operator import eq, itemgetter
+from urllib.parse import quote
+from array import array
+import bisect
+import contextvars
+import cProfile
+import gzip
+import hashlib
+import heapq
 import json
+import math
+import os
+import queue
 import random
+import re
+import threading
+import time
+import zlib
 
-# Flask app
-app = Flask(__name__)
-app.secret_key = 'sage_demo_feed_2025'
+try:
+    import orjson  # optional: faster JSON encoding for feed responses
+except ImportError:
+    orjson = None
+
+try:
+    import numpy  # optional: vectorized sentiment analytics
+except ImportError:
+    numpy = None
+
+try:
+    import brotli  # optional: brotli response compression, preferred over gzip
+except ImportError:
+    brotli = None
+
+try:
+    import pyinstrument  # optional: sampling profiler for X-Sage-Profile: pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Routes live on a blueprint; create_app() builds the Flask app around it
+bp = Blueprint('sage', __name__)
 
 # Configuration
 DEMO_DB_PATH = 'demo_data.db'
+DEFAULT_FEED_LIMIT = 100
+MAX_FEED_LIMIT = 1000
 
-class DemoFeedCollector:
+# SQLite connection pool settings
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT_SECONDS = 30
+DB_BUSY_TIMEOUT_SECONDS = 10
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHE_SIZE_KB = 64 * 1024
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Hot feed cache settings
+HOT_CACHE_SIZE = 500            # newest items kept in memory per feed type
+
+# Full-text search settings
+SEARCH_SNIPPET_TOKENS = 16
+SEARCH_HIGHLIGHT = ('<mark>', '</mark>')
+
+# Bulk ingest settings
+INGEST_BATCH_SIZE = 1000        # records written per transaction
+INGEST_TEXT_CHARS = 2000        # text fields other than content and HTML bodies are cut to this
+INGEST_KEY_CHARS = 256          # longer source_id / message_id keys are rejected
+EMAIL_PREVIEW_CHARS = 200
+
+# Sentiment analytics settings (hours)
+ANALYTICS_WINDOW_HOURS = 6      # rolling window averaged at each point
+ANALYTICS_SPAN_HOURS = 168      # how far back the series reaches
+ANALYTICS_STEP_HOURS = 1        # spacing between points
+ANALYTICS_MAX_POINTS = 2000
+
+# Email HTML bodies, stored zlib-compressed in email_bodies
+EMAIL_BODY_COMPRESSION_LEVEL = 6
+
+# Item detail settings
+DETAIL_CACHE_SIZE = 2000        # detail payloads kept in the LRU cache
+MAX_DETAIL_IDS = 500            # ids per /api/items call, one IN (...) query per table
+
+# Response compression settings
+COMPRESS_MIN_BYTES = 1024       # smaller responses are sent as-is
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/plain'}
+GZIP_LEVEL = 6                  # per-request levels; precompressed pages use the maximum
+BROTLI_QUALITY = 5
+CONTENT_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+PRECOMPRESSED_TEMPLATES = ('index.html',)
+PAGE_MAX_AGE_SECONDS = 300
+
+# Streamed (chunked) response settings
+FETCH_CHUNK_ROWS = 500          # rows per fetchmany() and per response chunk
+MAX_STREAMED_FEED_LIMIT = 100000  # /api/feed limits above MAX_FEED_LIMIT are streamed
+MAX_EXPORTS = 2                 # streamed responses open at once per process; each holds a server thread
+EXPORT_RETRY_AFTER_SECONDS = 10
+
+# Feed source fan-out settings
+SOURCE_FETCH_WORKERS = 4        # threads per source, so a slow source only ties up its own
+SOURCE_TIMEOUT_SECONDS = 2.0    # a page is served without any non-local source slower than this
+
+# Retention, archive and maintenance settings
+RETENTION_DAYS = None           # e.g. 90: older items move to monthly archive databases
+MIN_RETENTION_DAYS = 8          # time ranges and analytics read up to 7 days from the hot tables
+ARCHIVE_BATCH_ROWS = 2000       # items moved per transaction
+MAINTENANCE_INTERVAL_SECONDS = 3600
+MAINTENANCE_FIRST_PASS_SECONDS = 60
+VACUUM_FREE_RATIO = 0.25        # VACUUM once free pages reach this share of the file
+
+# Story clustering settings
+CLUSTER_PERMUTATIONS = 60       # MinHash signature length
+CLUSTER_BAND_ROWS = 3           # LSH band width: 20 bands surface candidates from about 0.3 similarity
+CLUSTER_SIMILARITY = 0.5        # estimated Jaccard similarity needed to join a story
+CLUSTER_SHINGLE_CHARS = 3       # at most 8: shingles are packed into 64-bit integers
+CLUSTER_WINDOW_HOURS = 12       # a story only takes items this close to its latest one
+CLUSTER_BACKFILL_DAYS = 7       # unclustered items this recent are clustered on startup
+CLUSTER_SEED = 2025
+
+# Instrumentation settings (histogram upper bounds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 250, 500, 1000)
+PROFILE_HEADER = 'X-Sage-Profile'  # per-request profiles, only when SAGE_PROFILE_DIR is set
+
+# Live stream (SSE) settings
+STREAM_QUEUE_SIZE = 64          # events buffered per client before it must resync
+STREAM_HEARTBEAT_SECONDS = 15
+MAX_STREAMS = 4                 # open streams per process; each holds a server thread
+STREAM_RETRY_AFTER_SECONDS = 30 # refused clients poll, then retry streaming after this
+CHANGE_POLL_SECONDS = 1.0       # how often out-of-process writes are picked up
+
+# Absolute display time, rendered once when an item is stored
+DISPLAY_TIME_FORMAT = '%b %d, %Y at %I:%M %p'
+
+# Tie-break order between sources sharing the same timestamp
+SOURCE_RANKS = {'email': 0, 'tweet': 1}
+
+# Item tables and the sources they feed
+FEED_TABLES = {'tweet': 'tweets', 'email': 'emails'}
+FEED_TYPE_SOURCES = {'all': ('tweet', 'email'), 'twitter': ('tweet',), 'email': ('email',)}
+FEED_TIME_COLUMNS = {'tweet': 'created_at', 'email': 'received_at'}
+FEED_NATURAL_KEYS = {'tweet': 'source_id', 'email': 'message_id'}
+
+# Rolling windows answered from the hourly rollups; 'today' starts at local midnight
+TIME_RANGES = {'1h': timedelta(hours=1), '24h': timedelta(hours=24),
+               '48h': timedelta(hours=48), '7d': timedelta(days=7)}
+TIME_RANGE_LABELS = {'today': 'Today', '1h': 'Last hour', '24h': 'Last 24 hours',
+                     '48h': 'Last 48 hours', '7d': 'Last 7 days'}
+FACET_LIMIT = 20                # values returned per facet, largest first
+
+class Metrics:
+    """Process-wide counters, gauges and histograms, rendered in Prometheus text format
+    
+    Each worker process keeps its own, so every sample carries a pid label:
+    a scrape shows whichever worker answered it.
+    """
+    
     def __init__(self):
-        self.db_path = DEMO_DB_PATH
+        self.lock = threading.Lock()
+        self.families = {}
+    
+    def describe(self, name, kind, help_text, buckets=None):
+        """Declare a metric family ('counter', 'gauge', or 'histogram' with bucket upper bounds)"""
+        with self.lock:
+            self.families.setdefault(name, {'kind': kind, 'help': help_text, 'samples': {},
+                                            'buckets': buckets})
+    
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            samples = self.families[name]['samples']
+            samples[key] = samples.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.families[name]['samples'][tuple(sorted(labels.items()))] = value
+    
+    def observe(self, name, value, **labels):
+        """Add one observation to a histogram; the last count is the +Inf bucket"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            family = self.families[name]
+            sample = family['samples'].get(key)
+            if sample is None:
+                sample = family['samples'][key] = [[0] * (len(family['buckets']) + 1), 0]
+            sample[0][bisect.bisect_left(family['buckets'], value)] += 1
+            sample[1] += value
+    
+    def render(self):
+        lines = []
+        pid = (('pid', os.getpid()),)
+        with self.lock:
+            for name, family in self.families.items():
+                lines.append(f'# HELP {name} {family["help"]}')
+                lines.append(f'# TYPE {name} {family["kind"]}')
+                for labels, value in family['samples'].items():
+                    labels = pid + labels
+                    if family['kind'] == 'histogram':
+                        lines.extend(self.render_histogram(name, family['buckets'], labels, value))
+                    else:
+                        lines.append(f'{name}{self.format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+    
+    def render_histogram(self, name, buckets, labels, value):
+        counts, total = value
+        cumulative = 0
+        for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            yield f'{name}_bucket{self.format_labels(labels + (("le", bound),))} {cumulative}'
+        yield f'{name}_sum{self.format_labels(labels)} {total}'
+        yield f'{name}_count{self.format_labels(labels)} {cumulative}'
+    
+    def format_labels(self, labels):
+        return '{' + ','.join(f'{key}="{val}"' for key, val in labels) + '}' if labels else ''
+
+metrics = Metrics()
+metrics.describe('sage_stage_seconds', 'histogram', 'Time spent per instrumented stage', LATENCY_BUCKETS)
+
+# Stage timings of the request being handled on this thread, for Server-Timing
+request_stages = contextvars.ContextVar('sage_request_stages', default=None)
+
+class Stage:
+    """Time a block into sage_stage_seconds and the current request's stage timings
+    
+        with Stage('sql'):
+            rows = conn.execute(...)
+    
+    A plain class rather than @contextmanager: it wraps every feed query.
+    """
+    __slots__ = ('name', 'start')
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+    
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        metrics.observe('sage_stage_seconds', elapsed, stage=self.name)
+        stages = request_stages.get()
+        if stages is not None:
+            stages[self.name] = stages.get(self.name, 0) + elapsed
+
+class ConnectionPool:
+    """Bounded pool of tuned SQLite connections
+    
+    Connections are opened lazily up to `size` and reused across requests
+    and threads. Each one runs in WAL mode with synchronous=NORMAL, so
+    readers never block behind an ingest write, and keeps its own cache
+    of prepared statements.
+    """
+    
+    def __init__(self, db_path, size=DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+        
+        metrics.describe('sage_db_pool_checkouts_total', 'counter', 'Connections handed out by the pool')
+        metrics.describe('sage_db_pool_waits_total', 'counter', 'Checkouts that waited for a busy pool')
+        metrics.describe('sage_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a pooled connection')
+        metrics.describe('sage_db_pool_connections', 'gauge', 'Open pooled connections')
+    
+    def open(self):
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SECONDS,
+                               check_same_thread=False,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+        return conn
+    
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self.lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        
+        if can_open:
+            try:
+                conn = self.open()
+            except sqlite3.Error:
+                with self.lock:
+                    self.opened -= 1
+                raise
+            metrics.set('sage_db_pool_connections', self.opened)
+            return conn
+        
+        start = time.perf_counter()
+        try:
+            conn = self.idle.get(timeout=DB_POOL_TIMEOUT_SECONDS)
+        except queue.Empty:
+            raise sqlite3.OperationalError('Timed out waiting for a pooled connection')
+        finally:
+            metrics.inc('sage_db_pool_waits_total')
+            metrics.inc('sage_db_pool_wait_seconds_total', time.perf_counter() - start)
+        return conn
+    
+    def close(self):
+        """Close the idle connections, e.g. before forking worker processes"""
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+        metrics.set('sage_db_pool_connections', self.opened)
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection, returning it with no transaction left open"""
+        conn = self.acquire()
+        metrics.inc('sage_db_pool_checkouts_total')
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
+
+def iter_rows(rows, size=FETCH_CHUNK_ROWS):
+    """Iterate a sqlite3 cursor in fetchmany() batches, timed as the 'sql' stage"""
+    while True:
+        with Stage('sql'):
+            batch = rows.fetchmany(size)
+        if not batch:
+            return
+        yield from batch
+
+def render_fields(timestamp):
+    """(epoch, formatted_time) for a stored ISO timestamp, computed once per item"""
+    dt = datetime.fromisoformat(timestamp)
+    return dt.timestamp(), dt.strftime(DISPLAY_TIME_FORMAT)
+
+def format_time_ago(age_seconds):
+    """Format an age in seconds as 'X minutes/hours/days ago'"""
+    return format_age_minutes(max(int(age_seconds), 0) // 60)
+
+@lru_cache(maxsize=4096)
+def format_age_minutes(age_minutes):
+    days, minutes = divmod(age_minutes, 1440)
+    
+    if days > 0:
+        return f"{days} day{'s' if days > 1 else ''} ago"
+    elif minutes >= 60:
+        hours = minutes // 60
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    elif minutes < 1:
+        return "just now"
+    return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+
+class FeedItem:
+    """A unified feed item, built straight from a database row
+    
+    Items are slotted and never mutated once cached. The wire dict,
+    including the relative time_ago, is produced only at serialization
+    time by to_dict().
+    """
+    __slots__ = ('row_id', 'timestamp', 'epoch', 'formatted_time', 'cluster_id', 'score', 'snippet')
+    item_type = None
+    
+    @property
+    def id(self):
+        return f'{self.item_type}_{self.row_id}'
+    
+    def sort_key(self):
+        """The (timestamp, rank, id) feed order key"""
+        return (self.timestamp, SOURCE_RANKS[self.item_type], self.row_id)
+    
+    def finish_row(self):
+        self.score = self.snippet = None
+        if self.epoch is None:
+            # Written by a tool that skipped the render fields
+            self.epoch, self.formatted_time = render_fields(self.timestamp)
+        return self
+    
+    def add_search_fields(self, data):
+        if self.score is not None:
+            data['score'] = self.score
+            data['snippet'] = self.snippet
+        return data
+
+class TweetItem(FeedItem):
+    __slots__ = ('author', 'author_name', 'content', 'likes', 'retweets', 'sentiment', 'impact')
+    item_type = 'tweet'
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build from a DemoFeedCollector.TWEET_ITEM_COLUMNS row"""
+        item = cls.__new__(cls)
+        (item.row_id, item.author, item.author_name, item.content, item.timestamp,
+         item.likes, item.retweets, item.sentiment, item.impact,
+         item.epoch, item.formatted_time, item.cluster_id) = row
+        return item.finish_row()
+    
+    def to_dict(self, now):
+        return self.add_search_fields({
+            'type': 'tweet',
+            'id': f'tweet_{self.row_id}',
+            'author': self.author,
+            'author_name': self.author_name,
+            'content': self.content,
+            'timestamp': self.timestamp,
+            'likes': self.likes,
+            'retweets': self.retweets,
+            'sentiment': self.sentiment,
+            'impact': self.impact,
+            'source': 'Twitter',
+            'epoch': self.epoch,
+            'formatted_time': self.formatted_time,
+            'time_ago': format_time_ago(now - self.epoch)
+        })
+
+class EmailItem(FeedItem):
+    __slots__ = ('sender', 'sender_email', 'subject', 'preview', 'content', 'category', 'has_attachment')
+    item_type = 'email'
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build from a DemoFeedCollector.EMAIL_ITEM_COLUMNS row"""
+        item = cls.__new__(cls)
+        (item.row_id, item.sender, item.sender_email, item.subject, item.preview,
+         item.content, item.timestamp, item.category, item.has_attachment,
+         item.epoch, item.formatted_time, item.cluster_id) = row
+        return item.finish_row()
+    
+    def to_dict(self, now):
+        return self.add_search_fields({
+            'type': 'email',
+            'id': f'email_{self.row_id}',
+            'sender': self.sender,
+            'sender_email': self.sender_email,
+            'subject': self.subject,
+            'preview': self.preview,
+            'content': self.content,
+            'timestamp': self.timestamp,
+            'category': self.category,
+            'has_attachment': self.has_attachment,
+            'source': 'Email',
+            'epoch': self.epoch,
+            'formatted_time': self.formatted_time,
+            'time_ago': format_time_ago(now - self.epoch)
+        })
+
+ITEM_CLASSES = {'tweet': TweetItem, 'email': EmailItem}
+
+class Story:
+    """The newest item of a story standing in for all of it in a collapsed feed"""
+    __slots__ = ('item', 'cluster_id', 'members')
+    
+    def __init__(self, item, cluster_id, members):
+        self.item = item
+        self.cluster_id = cluster_id
+        self.members = members
+    
+    def to_dict(self, now):
+        data = self.item.to_dict(now)
+        data['cluster_id'] = self.cluster_id
+        data['cluster_size'] = self.members
+        return data
+
+def dumps_json(payload):
+    """Serialize an API payload, writing FeedItems in their wire format
+    
+    Uses orjson when it is installed and the standard library otherwise.
+    """
+    now = time.time()
+    
+    def default(obj):
+        if isinstance(obj, (FeedItem, Story)):
+            return obj.to_dict(now)
+        raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+    
+    if orjson is not None:
+        return orjson.dumps(payload, default=default).decode()
+    return json.dumps(payload, default=default)
+
+def json_response(payload, status=200):
+    with Stage('serialize'):
+        body = dumps_json(payload)
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+class FeedWindow:
+    """The newest items of one feed type, held in ascending sort-key order
+    
+    The window is always a contiguous run from the newest item down, so any
+    page whose rows fall inside it can be answered without the database.
+    `complete` means the window holds the whole feed, not just its top.
+    """
+    
+    def __init__(self, size):
+        self.size = size
+        self.keys = []
+        self.items = {}
+        self.keys_by_id = {}
+        self.complete = False
+    
+    def fill(self, rows, complete):
+        """Load the newest (key, item) rows, in any order"""
+        for key, item in rows:
+            self.items[key] = item
+            self.keys_by_id[item.id] = key
+        self.keys = sorted(self.items)
+        self.complete = complete
+    
+    def upsert(self, key, item):
+        """Insert or move an item, returning how many old items were evicted"""
+        self.remove(item.id)
+        if not self.complete and (not self.keys or key < self.keys[0]):
+            # Older than the window: holding it would leave a gap
+            return 0
+        
+        bisect.insort(self.keys, key)
+        self.items[key] = item
+        self.keys_by_id[item.id] = key
+        
+        evicted = len(self.keys) - self.size
+        if evicted <= 0:
+            return 0
+        for old_key in self.keys[:evicted]:
+            del self.keys_by_id[self.items.pop(old_key).id]
+        del self.keys[:evicted]
+        self.complete = False
+        return evicted
+    
+    def remove(self, item_id):
+        key = self.keys_by_id.pop(item_id, None)
+        if key is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+            del self.items[key]
+    
+    def page(self, limit, cursor, newer):
+        """Up to limit + 1 (key, item) rows in query order, or None if the window can't answer"""
+        need = limit + 1
+        
+        if newer:
+            if cursor is None or (not self.complete and (not self.keys or cursor < self.keys[0])):
+                return None
+            start = bisect.bisect_right(self.keys, cursor)
+            keys = self.keys[start:start + need]
+        else:
+            end = len(self.keys) if cursor is None else bisect.bisect_left(self.keys, cursor)
+            if end < need and not self.complete:
+                return None
+            keys = self.keys[max(end - need, 0):end][::-1]
+        
+        return [(key, self.items[key]) for key in keys]
+    
+    def prefix(self, cursor, newer):
+        """Every row the window holds past the cursor, in query order
+        
+        The window holds the newest items without gaps, so these are always
+        the first rows of the query; an empty list means read SQLite.
+        """
+        if newer:
+            if cursor is None or (not self.complete and (not self.keys or cursor < self.keys[0])):
+                return []
+            keys = self.keys[bisect.bisect_right(self.keys, cursor):]
+        else:
+            end = len(self.keys) if cursor is None else bisect.bisect_left(self.keys, cursor)
+            keys = self.keys[end - 1::-1] if end else []
+        return [(key, self.items[key]) for key in keys]
+
+class HotFeedCache:
+    """In-memory windows of the newest items per feed type
+    
+    Windows are loaded once, then kept current from the change log: the
+    collector refreshes them right after its own writes, and reads check for
+    writes from other processes at most every CHANGE_POLL_SECONDS.
+    """
+    
+    def __init__(self, collector, size=HOT_CACHE_SIZE):
+        self.collector = collector
+        self.size = size
+        self.lock = threading.Lock()
+        self.windows = None
+        self.seq = 0
+        self.checked_at = 0.0
+        collector.add_change_listener(lambda: self.refresh(force=True))
+        
+        metrics.describe('sage_hot_cache_hits_total', 'counter', 'Feed pages served from memory')
+        metrics.describe('sage_hot_cache_misses_total', 'counter', 'Feed pages that fell back to SQLite')
+        metrics.describe('sage_hot_cache_evictions_total', 'counter', 'Items pushed out of a hot window')
+        metrics.describe('sage_hot_cache_items', 'gauge', 'Items held per hot window')
+    
+    def load(self):
+        seq = self.collector.get_change_seq()
+        windows = {}
+        for feed_type in FEED_TYPE_SOURCES:
+            window = FeedWindow(self.size)
+            rows = self.collector.query_feed_page(feed_type, self.size)
+            window.fill(rows[:self.size], complete=len(rows) <= self.size)
+            windows[feed_type] = window
+        self.windows, self.seq = windows, seq
+    
+    def refresh(self, force=False):
+        """Apply change log entries past our seq, polling at most every CHANGE_POLL_SECONDS"""
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.checked_at < CHANGE_POLL_SECONDS:
+                return
+            self.checked_at = now
+            
+            if self.windows is None:
+                self.load()
+            else:
+                while self.collector.get_change_seq() > self.seq:
+                    changes = self.collector.get_feed_changes(self.seq, 'all', MAX_FEED_LIMIT)
+                    self.apply(changes)
+                    self.seq = changes['cursor']
+                
+                # Deletes only shrink a window; reload once it is half empty
+                if any(not window.complete and len(window.keys) < self.size // 2
+                       for window in self.windows.values()):
+                    self.load()
+            
+            for feed_type, window in self.windows.items():
+                metrics.set('sage_hot_cache_items', len(window.keys), feed_type=feed_type)
+    
+    def apply(self, changes):
+        for item_id in changes['deleted']:
+            for window in self.windows.values():
+                window.remove(item_id)
+        
+        for item in changes['items']:
+            key = item.sort_key()
+            for feed_type, item_types in FEED_TYPE_SOURCES.items():
+                if item.item_type in item_types:
+                    evicted = self.windows[feed_type].upsert(key, item)
+                    if evicted:
+                        metrics.inc('sage_hot_cache_evictions_total', evicted, feed_type=feed_type)
+    
+    def get_page(self, feed_type, limit, cursor=None, newer=False):
+        """Same rows as DemoFeedCollector.query_feed_page, or None on a miss"""
+        self.refresh()
+        with self.lock:
+            page = self.windows[feed_type].page(limit, cursor, newer)
+        
+        metrics.inc('sage_hot_cache_hits_total' if page is not None else 'sage_hot_cache_misses_total',
+                    feed_type=feed_type)
+        return page
+    
+    def get_prefix(self, feed_type, cursor=None, newer=False):
+        """The window's rows past the cursor, in query order (see FeedWindow.prefix)"""
+        self.refresh()
+        with self.lock:
+            return self.windows[feed_type].prefix(cursor, newer)
+    
+    def current_seq(self):
+        """Change seq the windows reflect, checked against SQLite at most every CHANGE_POLL_SECONDS"""
+        self.refresh()
+        return self.seq
+
+class SentimentSeries:
+    """Tweet score columns held in contiguous arrays for rolling analytics
+    
+    Rows are kept in epoch order with running (prefix) sums of the
+    confidence weight, weighted scores and hawkish/dovish counts, so any
+    window's totals are two lookups and a subtraction. The change log is
+    applied in place: new tweets are appended, late ones inserted at their
+    position, updated ones rewritten and deleted ones removed, and the
+    prefix sums are rebuilt from the first row touched. Batch work uses
+    numpy when installed.
+    """
+    
+    SCORES = ('monetary_policy', 'market_sentiment', 'market_impact')
+    COLUMNS = f"id, epoch, author_username, sentiment, confidence, {', '.join(SCORES)}"
+    STANCES = {'hawkish': 1, 'dovish': -1}
+    APPEND_CHUNK_ROWS = 65536       # rows converted to columns at a time
+    RELOAD_CHANGE_ROWS = 5000       # more updates, deletes and late rows than this reload instead
+    
+    def __init__(self, collector):
+        self.collector = collector
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.seq = 0
+        self.checked_at = 0.0
+        collector.add_change_listener(self.invalidate)
+    
+    def invalidate(self):
+        self.checked_at = 0.0
+    
+    def reset(self):
+        self.epochs = array('d')
+        self.ids = array('q')
+        self.authors = array('q')
+        self.stances = array('b')
+        self.weights = array('d')
+        self.weighted = {score: array('d') for score in self.SCORES}
+        # Prefix sums: element i covers rows [0, i)
+        self.cum_weights = array('d', [0.0])
+        self.cum_weighted = {score: array('d', [0.0]) for score in self.SCORES}
+        self.cum_hawkish = array('q', [0])
+        self.cum_dovish = array('q', [0])
+        self.author_names = []
+        self.author_ids = {}
+    
+    def load(self):
+        seq = self.collector.get_change_seq()
+        self.reset()
+        with self.collector.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {self.COLUMNS}
+                FROM tweets
+                WHERE epoch IS NOT NULL
+                ORDER BY epoch, id
+            ''')
+            self.append_rows(iter_rows(rows))
+        self.seq, self.loaded = seq, True
+    
+    def append_rows(self, rows):
+        """Append (id, epoch, author, sentiment, confidence, *scores) rows column by column"""
+        rows = iter(rows)
+        for chunk in iter(lambda: list(islice(rows, self.APPEND_CHUNK_ROWS)), []):
+            ids, epochs, authors, sentiments, confidences, *scores = zip(*chunk)
+            weights = [confidence or 0.0 for confidence in confidences]
+            stances = [self.STANCES.get(sentiment, 0) for sentiment in sentiments]
+            
+            self.epochs.extend(epochs)
+            self.ids.extend(ids)
+            self.authors.extend(self.author_ids.setdefault(author, len(self.author_ids)) for author in authors)
+            self.author_names.extend(islice(self.author_ids, len(self.author_names), None))
+            self.stances.extend(stances)
+            self.weights.extend(weights)
+            self.extend_cumulative(self.cum_weights, weights)
+            for score, values in zip(self.SCORES, scores):
+                weighted = [weight * (value or 0.0) for weight, value in zip(weights, values)]
+                self.weighted[score].extend(weighted)
+                self.extend_cumulative(self.cum_weighted[score], weighted)
+            self.extend_cumulative(self.cum_hawkish, [stance > 0 for stance in stances])
+            self.extend_cumulative(self.cum_dovish, [stance < 0 for stance in stances])
+    
+    def extend_cumulative(self, totals, values):
+        totals.extend(islice(accumulate(values, initial=totals[-1]), 1, None))
+    
+    def rebuild_cumulative(self, start):
+        """Recompute the prefix sums for rows start onwards"""
+        columns = [(self.cum_weights, self.weights)]
+        columns.extend((self.cum_weighted[score], self.weighted[score]) for score in self.SCORES)
+        for totals, values in columns:
+            del totals[start + 1:]
+            self.extend_cumulative(totals, values[start:])
+        stances = self.stances[start:]
+        del self.cum_hawkish[start + 1:], self.cum_dovish[start + 1:]
+        self.extend_cumulative(self.cum_hawkish, [stance > 0 for stance in stances])
+        self.extend_cumulative(self.cum_dovish, [stance < 0 for stance in stances])
+    
+    def refresh(self):
+        """Catch up with the change log, at most every CHANGE_POLL_SECONDS unless invalidated"""
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < CHANGE_POLL_SECONDS:
+            return
+        self.checked_at = now
+        
+        if not self.loaded or not self.apply_changes():
+            self.load()
+    
+    def apply_changes(self):
+        """Apply tweet changes since our seq in place; False when a full reload is cheaper"""
+        with self.collector.pool.connection() as conn:
+            high_water = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM feed_changes").fetchone()[0]
+            if high_water == self.seq:
+                return True
+            
+            changed = list({item_id for item_id, in conn.execute('''
+                SELECT item_id FROM feed_changes
+                WHERE seq > ? AND seq <= ? AND +item_type = 'tweet'
+            ''', (self.seq, high_water))})
+            rows = []
+            for offset in range(0, len(changed), FETCH_CHUNK_ROWS):
+                ids = changed[offset:offset + FETCH_CHUNK_ROWS]
+                rows.extend(conn.execute(f'''
+                    SELECT {self.COLUMNS}
+                    FROM tweets
+                    WHERE id IN ({', '.join('?' * len(ids))}) AND epoch IS NOT NULL
+                ''', ids))
+        
+        positions = self.positions(changed)
+        current = {row[0]: row for row in rows}
+        tail = (self.epochs[-1], self.ids[-1]) if self.epochs else None
+        late = sum(1 for row_id, row in current.items()
+                   if row_id not in positions and tail is not None and (row[1], row_id) < tail)
+        if len(positions) + late > self.RELOAD_CHANGE_ROWS:
+            return False
+        
+        # Rows we hold for changed ids: rewritten while their time is unchanged, else removed
+        removed, dirty = [], len(self.epochs)
+        for row_id, position in positions.items():
+            row = current.get(row_id)
+            if row is not None and row[1] == self.epochs[position]:
+                self.write_row(position, row)
+                del current[row_id]
+            else:
+                removed.append(position)
+            dirty = min(dirty, position)
+        for position in sorted(removed, reverse=True):
+            for column in self.row_columns():
+                del column[position]
+        
+        # What is left is inserted at its place, or appended in bulk once it sorts after every row
+        fresh = sorted(current.values(), key=itemgetter(1, 0))
+        split = 0
+        if self.epochs:
+            tail = (self.epochs[-1], self.ids[-1])
+            split = next((k for k, row in enumerate(fresh) if (row[1], row[0]) > tail), len(fresh))
+        for row in fresh[:split]:
+            position = self.insert_position(row[1], row[0])
+            self.insert_row(position, row)
+            dirty = min(dirty, position)
+        if dirty < len(self.cum_weights) - 1:
+            self.rebuild_cumulative(dirty)
+        
+        self.append_rows(fresh[split:])
+        self.seq = high_water
+        return True
+    
+    def row_columns(self):
+        return [self.epochs, self.ids, self.authors, self.stances, self.weights,
+                *(self.weighted[score] for score in self.SCORES)]
+    
+    def row_values(self, row):
+        """A tweets row, in COLUMNS order, as values in row_columns() order"""
+        row_id, epoch, author, sentiment, confidence, *scores = row
+        if author not in self.author_ids:
+            self.author_ids[author] = len(self.author_names)
+            self.author_names.append(author)
+        weight = confidence or 0.0
+        return (epoch, row_id, self.author_ids[author], self.STANCES.get(sentiment, 0), weight,
+                *(weight * (value or 0.0) for value in scores))
+    
+    def write_row(self, position, row):
+        for column, value in zip(self.row_columns(), self.row_values(row)):
+            column[position] = value
+    
+    def insert_row(self, position, row):
+        for column, value in zip(self.row_columns(), self.row_values(row)):
+            column.insert(position, value)
+    
+    def insert_position(self, epoch, row_id):
+        """Where a row sorts in (epoch, id) order"""
+        position = bisect.bisect_right(self.epochs, epoch)
+        while position > 0 and self.epochs[position - 1] == epoch and self.ids[position - 1] > row_id:
+            position -= 1
+        return position
+    
+    def positions(self, row_ids):
+        """{id: row index} for the given ids that we hold, in one pass over the id column"""
+        if numpy is not None:
+            ids = numpy.frombuffer(self.ids, dtype=numpy.int64)
+            found = numpy.flatnonzero(numpy.isin(ids, row_ids)).tolist()
+            return {self.ids[position]: position for position in found}
+        wanted = set(row_ids)
+        return {row_id: position for position, row_id in enumerate(self.ids) if row_id in wanted}
+    
+    def analyze(self, window, span, step, now=None):
+        """Rolling confidence-weighted averages, momentum and per-author aggregates
+        
+        Points run every `step` seconds over the last `span` seconds; each
+        averages the `window` seconds ending at it. Returned series are
+        columnar lists, one value per point.
+        """
+        now = time.time() if now is None else now
+        points = [now - span + step * (k + 1) for k in range(int(span // step))]
+        
+        with self.lock:
+            self.refresh()
+            if numpy is not None:
+                epochs = numpy.frombuffer(self.epochs, dtype=numpy.float64)
+                ends = numpy.searchsorted(epochs, points, side='right').tolist()
+                starts = numpy.searchsorted(epochs, [point - window for point in points], side='right').tolist()
+                span_start = int(numpy.searchsorted(epochs, now - span, side='right'))
+            else:
+                ends = [bisect.bisect_right(self.epochs, point) for point in points]
+                starts = [bisect.bisect_right(self.epochs, point - window) for point in points]
+                span_start = bisect.bisect_right(self.epochs, now - span)
+            span_end = bisect.bisect_right(self.epochs, now)
+            
+            series = self.window_series(starts, ends)
+            series['time'] = points
+            authors = self.author_aggregates(span_start, span_end)
+        
+        policy = series['monetary_policy']
+        lag = max(1, int(window // step))
+        return {
+            'tweets': span_end - span_start,
+            'series': series,
+            'momentum': {
+                'current': series['momentum'][-1] if points else None,
+                'policy_change': (policy[-1] - policy[-1 - lag]
+                                  if len(policy) > lag and None not in (policy[-1], policy[-1 - lag]) else None)
+            },
+            'authors': authors
+        }
+    
+    def window_series(self, starts, ends):
+        """Per-window totals from the prefix sums"""
+        pairs = list(zip(starts, ends))
+        weights = [self.cum_weights[end] - self.cum_weights[start] for start, end in pairs]
+        hawkish = [self.cum_hawkish[end] - self.cum_hawkish[start] for start, end in pairs]
+        dovish = [self.cum_dovish[end] - self.cum_dovish[start] for start, end in pairs]
+        
+        series = {
+            'count': [end - start for start, end in pairs],
+            'confidence': [total / (end - start) if end > start else None
+                           for total, (start, end) in zip(weights, pairs)],
+            'hawkish': hawkish,
+            'dovish': dovish,
+            'momentum': [(h - d) / (h + d) if h + d else None for h, d in zip(hawkish, dovish)]
+        }
+        for score in self.SCORES:
+            totals = self.cum_weighted[score]
+            series[score] = [(totals[end] - totals[start]) / weight if weight else None
+                             for (start, end), weight in zip(pairs, weights)]
+        return series
+    
+    def author_aggregates(self, start, end):
+        """Count, hawkish/dovish counts and weighted mean scores per author over rows [start, end)"""
+        size = len(self.author_names)
+        if numpy is not None:
+            authors = numpy.frombuffer(self.authors, dtype=numpy.int64)[start:end]
+            stances = numpy.frombuffer(self.stances, dtype=numpy.int8)[start:end]
+            counts = numpy.bincount(authors, minlength=size).tolist()
+            hawkish = numpy.bincount(authors, weights=stances > 0, minlength=size).astype(int).tolist()
+            dovish = numpy.bincount(authors, weights=stances < 0, minlength=size).astype(int).tolist()
+            weights = numpy.bincount(authors, weights=numpy.frombuffer(self.weights)[start:end], minlength=size).tolist()
+            weighted = {score: numpy.bincount(authors, weights=numpy.frombuffer(self.weighted[score])[start:end],
+                                              minlength=size).tolist()
+                        for score in self.SCORES}
+        else:
+            counts, hawkish, dovish, weights = [0] * size, [0] * size, [0] * size, [0.0] * size
+            weighted = {score: [0.0] * size for score in self.SCORES}
+            for i in range(start, end):
+                author = self.authors[i]
+                counts[author] += 1
+                hawkish[author] += self.stances[i] > 0
+                dovish[author] += self.stances[i] < 0
+                weights[author] += self.weights[i]
+                for score in self.SCORES:
+                    weighted[score][author] += self.weighted[score][i]
+        
+        ranked = sorted((author for author in range(size) if counts[author]),
+                        key=lambda author: (-counts[author], self.author_names[author]))
+        return [{
+            'author': self.author_names[author],
+            'count': counts[author],
+            'hawkish': hawkish[author],
+            'dovish': dovish[author],
+            'confidence': weights[author] / counts[author],
+            **{score: weighted[score][author] / weights[author] if weights[author] else None
+               for score in self.SCORES}
+        } for author in ranked[:FACET_LIMIT]]
+
+class DetailCache:
+    """LRU cache of item detail payloads keyed by item id
+    
+    Entries are dropped as their items appear in the change log, checked
+    right after the collector's own writes and otherwise at most every
+    CHANGE_POLL_SECONDS. A fill is discarded if the log moved on while it
+    was being read, so a stale payload is never cached.
+    """
+    
+    def __init__(self, collector, size=DETAIL_CACHE_SIZE):
+        self.collector = collector
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.seq = None
+        self.checked_at = 0.0
+        collector.add_change_listener(self.invalidate)
+        
+        metrics.describe('sage_detail_cache_hits_total', 'counter', 'Item details served from memory')
+        metrics.describe('sage_detail_cache_misses_total', 'counter', 'Item details read from SQLite')
+    
+    def invalidate(self):
+        self.checked_at = 0.0
+    
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.checked_at < CHANGE_POLL_SECONDS:
+            return
+        self.checked_at = now
+        
+        with self.collector.pool.connection() as conn:
+            if self.seq is None:
+                self.seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM feed_changes").fetchone()[0]
+                return
+            changes = conn.execute('''
+                SELECT seq, item_type, item_id FROM feed_changes
+                WHERE seq > ?
+                ORDER BY seq
+            ''', (self.seq,)).fetchall()
+        
+        for _, item_type, item_id in changes:
+            self.entries.pop(f'{item_type}_{item_id}', None)
+        if changes:
+            self.seq = changes[-1][0]
+    
+    def get_many(self, item_ids):
+        """Cached payloads for the ids we hold, and the seq to pass back to put_many"""
+        with self.lock:
+            self.refresh()
+            found = {}
+            for item_id in item_ids:
+                detail = self.entries.get(item_id)
+                if detail is not None:
+                    self.entries.move_to_end(item_id)
+                    found[item_id] = detail
+            seq = self.seq
+        
+        metrics.inc('sage_detail_cache_hits_total', len(found))
+        metrics.inc('sage_detail_cache_misses_total', len(set(item_ids)) - len(found))
+        return found, seq
+    
+    def put_many(self, details, seq):
+        with self.lock:
+            self.refresh()
+            if seq != self.seq:
+                return
+            self.entries.update(details)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+class FeedSource:
+    """A pluggable feed source, fetched concurrently with the others
+    
+    Subclasses implement iter_items(cursor, newer) as a generator of
+    (sort_key, item) pairs in feed order: newest first, or oldest first
+    past the cursor with newer=True. Keys are (timestamp, rank, id) with
+    the rank from SOURCE_RANKS, and items are FeedItems. A new source
+    gets a SOURCE_RANKS entry, joins FEED_TYPE_SOURCES['all'] and is
+    added with DemoFeedCollector.register_source().
+    
+    Local sources live in SQLite and are tracked by the change log, so the
+    hot cache and the feed ETags cover them; pages from other sources are
+    always fetched.
+    """
+    local = False
+    
+    def __init__(self, item_type, timeout=SOURCE_TIMEOUT_SECONDS):
+        self.item_type = item_type
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=SOURCE_FETCH_WORKERS,
+                                           thread_name_prefix=f'sage-source-{item_type}')
+    
+    def iter_items(self, cursor=None, newer=False):
+        raise NotImplementedError
+    
+    def fetch_page(self, cursor, count, newer=False):
+        """Up to count pairs past the cursor, read on one of this source's threads"""
+        items = self.iter_items(cursor, newer)
+        try:
+            return list(islice(items, count))
+        finally:
+            items.close()
+
+class SQLiteFeedSource(FeedSource):
+    """Tweets or emails from the collector's tables, each read on its own pooled connection
+    
+    No deadline by default: waiting on the pool or a busy database is
+    ordinary contention, not a reason to serve a page without the source.
+    """
+    local = True
+    
+    def __init__(self, collector, item_type, timeout=None):
+        super().__init__(item_type, timeout)
+        self.collector = collector
+        self.query = collector.get_twitter_items if item_type == 'tweet' else collector.get_email_items
+    
+    def iter_items(self, cursor=None, newer=False):
+        # Refreshed first: it takes a connection of its own
+        self.collector.archive.refresh()
+        with self.collector.pool.connection() as conn:
+            items = self.query(conn, cursor, newer)
+            yield from self.collector.archive.fall_through(self.item_type, items, cursor, newer)
+
+class FeedArchive:
+    """Monthly archive databases for items older than the retention period
+    
+    archive_old() moves items past retention_days out of the hot tables into
+    one SQLite file per month ('<db>_archive/2025-06.db'), ARCHIVE_BATCH_ROWS
+    per transaction, so the hot tables, their indexes and the page cache
+    only hold recent items. archive_partitions lists the months and, per
+    month, the time everything before which has been moved (the watermark).
+    
+    Reads open a partition on demand, read-only and one at a time: older
+    pages continue from the hot tables into the partitions in feed order,
+    and detail lookups fall back to the partition archived_ids maps each
+    id to. Moves are not logged in
+    feed_changes and keep their rollup counts, so live clients see no
+    deletes and stats still cover the full history. Search and the change
+    log cover the hot tables only. Moved items' natural keys stay behind in
+    archived_keys and ingest skips them, so re-ingesting an archived item
+    does not bring back a second copy.
+    """
+    
+    def __init__(self, collector, retention_days=None):
+        if retention_days is not None and retention_days < MIN_RETENTION_DAYS:
+            raise ValueError(f'retention_days must be at least {MIN_RETENTION_DAYS}')
+        self.collector = collector
+        self.retention_days = retention_days
+        self.directory = os.path.splitext(collector.db_path)[0] + '_archive'
+        self.lock = threading.Lock()
+        self.months = []
+        self.watermark = None
+        self.checked_at = 0.0
+        
+        metrics.describe('sage_archive_moved_total', 'counter', 'Items moved into the monthly archives')
+        metrics.describe('sage_archive_reads_total', 'counter', 'Archive partitions opened by readers')
+        self.upgrade_partitions()
+    
+    def upgrade_partitions(self):
+        """Add columns the hot tables gained since a partition was last written to
+        
+        Partitions written before archived_keys or archived_ids existed have
+        their keys and ids copied into them.
+        """
+        self.refresh(force=True)
+        with self.collector.pool.connection() as conn:
+            copy_keys = conn.execute('SELECT 1 FROM archived_keys LIMIT 1').fetchone() is None
+            copy_ids = conn.execute('SELECT 1 FROM archived_ids LIMIT 1').fetchone() is None
+            for month in self.months:
+                conn.execute('ATTACH DATABASE ? AS archive', (self.partition_path(month),))
+                try:
+                    self.sync_schema(conn)
+                    if copy_ids:
+                        with conn:
+                            for item_type, table in FEED_TABLES.items():
+                                conn.execute(f'''
+                                    INSERT OR IGNORE INTO main.archived_ids (item_type, item_id, month)
+                                    SELECT ?, id, ? FROM archive.{table}
+                                ''', (item_type, month))
+                    if copy_keys:
+                        with conn:
+                            for item_type, table in FEED_TABLES.items():
+                                key = FEED_NATURAL_KEYS[item_type]
+                                conn.execute(f'''
+                                    INSERT OR IGNORE INTO main.archived_keys (item_type, natural_key)
+                                    SELECT ?, {key} FROM archive.{table} WHERE {key} IS NOT NULL
+                                ''', (item_type,))
+                finally:
+                    conn.execute('DETACH DATABASE archive')
+    
+    def refresh(self, force=False):
+        """Reload the partition list, at most every CHANGE_POLL_SECONDS"""
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.checked_at < CHANGE_POLL_SECONDS:
+                return
+            self.checked_at = now
+            
+            with self.collector.pool.connection() as conn:
+                rows = conn.execute('SELECT month, archived_before FROM archive_partitions ORDER BY month').fetchall()
+            self.months = [month for month, _ in rows]
+            self.watermark = max((before for _, before in rows), default=None)
+    
+    def partition_path(self, month):
+        return os.path.join(self.directory, f'{month}.db')
+    
+    def open_partition(self, month):
+        metrics.inc('sage_archive_reads_total')
+        return sqlite3.connect(f'file:{quote(os.path.abspath(self.partition_path(month)))}?mode=ro',
+                               uri=True, timeout=DB_BUSY_TIMEOUT_SECONDS)
+    
+    def fall_through(self, item_type, items, cursor=None, newer=False):
+        """Continue a hot-table (sort_key, item) stream into the archive, in feed order
+        
+        Older pages only open partitions once the stream reaches the
+        watermark. Rows written to the hot tables with older timestamps
+        after a move are merged in, not skipped. Callers refresh() first,
+        before taking the pooled connection items is read on.
+        """
+        watermark = self.watermark
+        if watermark is None or (newer and cursor is not None and cursor[0] >= watermark):
+            yield from items
+            return
+        
+        archived = self.iter_partitions(item_type, cursor, newer, watermark)
+        if newer:
+            yield from heapq.merge(items, archived, key=itemgetter(0))
+            return
+        
+        for pair in items:
+            if pair[0][0] < watermark:
+                yield from heapq.merge(chain([pair], items), archived, key=itemgetter(0), reverse=True)
+                return
+            yield pair
+        yield from archived
+    
+    def iter_partitions(self, item_type, cursor, newer, watermark):
+        """Yield archived (sort_key, item) pairs past the cursor, one partition at a time"""
+        query = self.collector.get_twitter_items if item_type == 'tweet' else self.collector.get_email_items
+        months = self.months if newer else self.months[::-1]
+        if cursor is not None:
+            month = cursor[0][:7]
+            months = [m for m in months if (m >= month if newer else m <= month)]
+        
+        for month in months:
+            conn = self.open_partition(month)
+            try:
+                yield from query(conn, cursor, newer, before=watermark)
+            finally:
+                conn.close()
+    
+    def locate(self, conn, wanted):
+        """{month: {item_type: [ids]}} for the archived ones among {item_type: [ids]}"""
+        located = {}
+        for item_type, ids in wanted.items():
+            for offset in range(0, len(ids), FETCH_CHUNK_ROWS):
+                chunk = ids[offset:offset + FETCH_CHUNK_ROWS]
+                for item_id, month in conn.execute(f'''
+                    SELECT item_id, month FROM archived_ids
+                    WHERE item_type = ? AND item_id IN ({', '.join('?' * len(chunk))})
+                ''', (item_type, *chunk)):
+                    located.setdefault(month, {}).setdefault(item_type, []).append(item_id)
+        return located
+    
+    def partitions(self, located):
+        """Open the partitions of a locate() result, newest first
+        
+        Yields (connection, {item_type: [ids]}) and closes the connection
+        once the caller moves on.
+        """
+        for month in sorted(located, reverse=True):
+            conn = self.open_partition(month)
+            try:
+                yield conn, located[month]
+            finally:
+                conn.close()
+    
+    def archived_keys(self, conn, item_type, keys):
+        """The given natural keys whose items have been moved to the archive"""
+        keys, found = list(keys), []
+        for offset in range(0, len(keys), FETCH_CHUNK_ROWS):
+            chunk = keys[offset:offset + FETCH_CHUNK_ROWS]
+            found.extend(key for key, in conn.execute(f'''
+                SELECT natural_key FROM archived_keys
+                WHERE item_type = ? AND natural_key IN ({', '.join('?' * len(chunk))})
+            ''', (item_type, *chunk)))
+        return found
+    
+    def archive_old(self, now=None):
+        """Move items older than retention_days into their monthly partitions
+        
+        Safe to run from several processes at once: every batch takes the
+        write lock and re-selects what is left. Returns items moved per type.
+        """
+        moved = {item_type: 0 for item_type in FEED_TABLES}
+        if self.retention_days is None:
+            return moved
+        
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat()
+        with self.collector.pool.connection() as conn:
+            months = sorted({month for item_type, table in FEED_TABLES.items()
+                             for (month,) in conn.execute(f'''
+                                 SELECT DISTINCT substr({FEED_TIME_COLUMNS[item_type]}, 1, 7)
+                                 FROM {table} WHERE {FEED_TIME_COLUMNS[item_type]} < ?
+                             ''', (cutoff,)).fetchall()})
+            if months:
+                os.makedirs(self.directory, exist_ok=True)
+            
+            for month in months:
+                year, number = map(int, month.split('-'))
+                next_month = f'{year + number // 12:04d}-{number % 12 + 1:02d}'
+                before = min(cutoff, next_month)
+                
+                conn.execute('ATTACH DATABASE ? AS archive', (self.partition_path(month),))
+                try:
+                    self.sync_schema(conn)
+                    for item_type in FEED_TABLES:
+                        while True:
+                            count = self.move_batch(conn, item_type, month, before)
+                            if not count:
+                                break
+                            moved[item_type] += count
+                            metrics.inc('sage_archive_moved_total', count, item_type=item_type)
+                finally:
+                    conn.execute('DETACH DATABASE archive')
+        
+        self.refresh(force=True)
+        return moved
+    
+    def sync_schema(self, conn):
+        """Create the item tables in the attached partition, adding any columns the hot tables gained since"""
+        for table in (*FEED_TABLES.values(), 'email_bodies'):
+            sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                               (table,)).fetchone()[0]
+            conn.execute(sql.replace(f'CREATE TABLE {table}', f'CREATE TABLE IF NOT EXISTS archive.{table}', 1))
+            
+            existing = {row[1] for row in conn.execute(f'PRAGMA archive.table_info({table})')}
+            for _, column, declaration, *_ in conn.execute(f'PRAGMA main.table_info({table})').fetchall():
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE archive.{table} ADD COLUMN {column} {declaration}')
+        
+        for item_type, table in FEED_TABLES.items():
+            column = FEED_TIME_COLUMNS[item_type]
+            conn.execute(f'CREATE INDEX IF NOT EXISTS archive.idx_{table}_{column} ON {table}({column})')
+    
+    def move_batch(self, conn, item_type, month, before):
+        """Copy one batch of a month's items to the attached partition and delete them from the hot table
+        
+        The newest id always stays behind so INTEGER PRIMARY KEY never hands
+        an archived id out again. The archiving marker row stops the delete
+        triggers from logging the move or adjusting the rollups.
+        """
+        table, column, key = FEED_TABLES[item_type], FEED_TIME_COLUMNS[item_type], FEED_NATURAL_KEYS[item_type]
+        columns = ', '.join(row[1] for row in conn.execute(f'PRAGMA main.table_info({table})').fetchall())
+        selected = f'''
+            SELECT id FROM main.{table}
+            WHERE {column} >= ? AND {column} < ? AND id < (SELECT MAX(id) FROM main.{table})
+            ORDER BY {column} LIMIT {ARCHIVE_BATCH_ROWS}
+        '''
+        params = (month, before)
+        
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT INTO main.archiving DEFAULT VALUES')
+            count = conn.execute(f'''
+                INSERT OR REPLACE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table} WHERE id IN ({selected})
+            ''', params).rowcount
+            if count and item_type == 'email':
+                conn.execute(f'''
+                    INSERT OR IGNORE INTO archive.email_bodies (hash, body, raw_length)
+                    SELECT hash, body, raw_length FROM main.email_bodies
+                    WHERE hash IN (SELECT body_hash FROM main.emails WHERE id IN ({selected}))
+                ''', params)
+            conn.execute(f'''
+                INSERT OR IGNORE INTO main.archived_keys (item_type, natural_key)
+                SELECT ?, {key} FROM main.{table} WHERE id IN ({selected}) AND {key} IS NOT NULL
+            ''', (item_type, *params))
+            conn.execute(f'''
+                INSERT OR REPLACE INTO main.archived_ids (item_type, item_id, month)
+                SELECT ?, id, ? FROM main.{table} WHERE id IN ({selected})
+            ''', (item_type, month, *params))
+            conn.execute(f'DELETE FROM main.{table} WHERE id IN ({selected})', params)
+            conn.execute('DELETE FROM main.archiving')
+            if count:
+                conn.execute('''
+                    INSERT INTO main.archive_partitions (month, archived_before, items) VALUES (?, ?, ?)
+                    ON CONFLICT (month) DO UPDATE SET
+                        archived_before = MAX(archived_before, excluded.archived_before),
+                        items = items + excluded.items
+                ''', (month, before, count))
+        return count
+
+class MaintenanceScheduler:
+    """Background archive and compaction passes for one collector
+    
+    Each pass moves items past retention into the archive, checkpoints and
+    truncates the WAL, and VACUUMs once free pages reach VACUUM_FREE_RATIO
+    of the file, so the hot database stays small enough to stay cached.
+    Every worker process may run one; passes are idempotent.
+    """
+    
+    def __init__(self, collector, interval=MAINTENANCE_INTERVAL_SECONDS):
+        self.collector = collector
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='sage-maintenance', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+    
+    def run(self):
+        delay = min(MAINTENANCE_FIRST_PASS_SECONDS, self.interval)
+        while not self.stopped.wait(delay):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"⚠️  Maintenance pass failed: {e}")
+            delay = self.interval
+    
+    def run_once(self):
+        moved = self.collector.archive.archive_old()
+        if any(moved.values()):
+            print(f"🗄️  Archived {moved['tweet']} tweets and {moved['email']} emails")
+        self.collector.compact()
+
+class StoryClusterer:
+    """Groups near-duplicate items into stories as they are ingested
+    
+    An item's text (tweet text, email subject and preview) is normalized
+    and reduced to a MinHash signature over character shingles. The
+    signature's bands key an in-memory LSH index, so candidate stories are
+    found without comparing against every recent item. The candidate with
+    the highest estimated Jaccard similarity, at least CLUSTER_SIMILARITY,
+    gets the item, provided the story's latest item is within
+    CLUSTER_WINDOW_HOURS of it. Otherwise the item starts a new story row
+    in story_clusters.
+    
+    Methods run inside the ingest write transaction. That serializes
+    threads and processes, and lets the index catch up with items other
+    processes clustered before it assigns ids. The index covers one window
+    of stories and is rebuilt from the database on startup. Signatures use
+    numpy when installed.
+    """
+    
+    MASK = 2 ** 64 - 1
+    NOISE = re.compile(r'https?://\S+|@\w+|<[^>]+>')
+    TOKENS = re.compile(r'[a-z0-9$%.-]+')
+    TEXT_COLUMNS = {'tweet': 'text', 'email': "subject || ' ' || COALESCE(preview, '')"}
+    
+    def __init__(self, collector):
+        self.collector = collector
+        rng = random.Random(CLUSTER_SEED)
+        # Multiply-shift hashing: (a * h + b) mod 2**64, top 32 bits, with odd a
+        self.coefficients = [(rng.randrange(2 ** 64) | 1, rng.randrange(2 ** 64))
+                             for _ in range(CLUSTER_PERMUTATIONS)]
+        if numpy is not None:
+            self.multipliers = numpy.array([a for a, _ in self.coefficients], dtype=numpy.uint64)[:, None]
+            self.offsets = numpy.array([b for _, b in self.coefficients], dtype=numpy.uint64)[:, None]
+        self.window = CLUSTER_WINDOW_HOURS * 3600
+        
+        tweet_fields, email_fields = collector.TWEET_WRITE_FIELDS, collector.EMAIL_WRITE_FIELDS
+        self.row_fields = {
+            'tweet': (tweet_fields.index('text'), None, tweet_fields.index('epoch')),
+            'email': (email_fields.index('subject'), email_fields.index('preview'), email_fields.index('epoch'))
+        }
+        self.invalidate()
+        
+        metrics.describe('sage_stories_created_total', 'counter', 'Items that started a new story')
+        metrics.describe('sage_stories_joined_total', 'counter', 'Items clustered into an existing story')
+        
+        with collector.pool.connection() as conn:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                self.catch_up(conn)
+                self.backfill(conn)
+    
+    def invalidate(self):
+        """Drop the index; the next transaction reloads it from the database"""
+        self.buckets = {}           # (band number, band values) -> cluster id
+        self.stories = {}           # cluster id -> [signature, latest epoch, bucket keys]
+        self.seen = None            # table -> highest item id indexed
+        self.newest = self.pruned_at = 0.0
+    
+    def signature(self, text):
+        """MinHash signature of the text's shingles, or None when it has no words
+        
+        Normalized text is ASCII, so each shingle packs its characters into
+        one integer and needs no hashing before the permutations.
+        """
+        data = ' '.join(self.TOKENS.findall(self.NOISE.sub(' ', text.lower()))).encode()
+        if not data:
+            return None
+        size = min(CLUSTER_SHINGLE_CHARS, len(data))
+        count = len(data) - size + 1
+        
+        if numpy is not None:
+            chars = numpy.frombuffer(data, dtype=numpy.uint8).astype(numpy.uint64)
+            shingles = chars[:count]
+            for offset in range(1, size):
+                shingles = (shingles << numpy.uint64(8)) | chars[offset:offset + count]
+            # uint64 arithmetic wraps, which is the mod 2**64; the shift keeps the order of minimums
+            hashes = self.multipliers * shingles
+            hashes += self.offsets
+            return tuple((hashes.min(axis=1) >> numpy.uint64(32)).tolist())
+        
+        shingles = {int.from_bytes(data[i:i + size], 'big') for i in range(count)}
+        return tuple(min([((a * h + b) & self.MASK) >> 32 for h in shingles]) for a, b in self.coefficients)
+    
+    def band_keys(self, signature):
+        """(band number, band values) LSH keys of a signature"""
+        return list(enumerate(zip(*[iter(signature)] * CLUSTER_BAND_ROWS)))
+    
+    def match(self, signature, keys, epoch):
+        """Cluster id of the most similar story in the window, or None"""
+        best, best_score = None, CLUSTER_SIMILARITY * len(signature)
+        candidates = {self.buckets.get(key) for key in keys}
+        candidates.discard(None)
+        for cluster_id in candidates:
+            story_signature, latest, _ = self.stories[cluster_id]
+            if abs(epoch - latest) > self.window:
+                continue
+            score = sum(map(eq, signature, story_signature))
+            if score >= best_score:
+                best, best_score = cluster_id, score
+        return best
+    
+    def index(self, cluster_id, signature, epoch, keys=None):
+        """Record an item in its story, indexing the story if new
+        
+        Only a story's first signature is indexed and compared against,
+        so stories cannot drift and big ones do not crowd the buckets.
+        """
+        self.newest = max(self.newest, epoch)
+        story = self.stories.get(cluster_id)
+        if story is not None:
+            story[1] = max(story[1], epoch)
+        elif signature is not None:
+            keys = keys or self.band_keys(signature)
+            self.stories[cluster_id] = [signature, epoch, keys]
+            for key in keys:
+                self.buckets[key] = cluster_id
+    
+    def prune(self):
+        """Forget stories too old to take new items, every quarter window of item time"""
+        if self.newest - self.pruned_at < self.window / 4:
+            return
+        self.pruned_at = self.newest
+        horizon = self.newest - 2 * self.window
+        for cluster_id in [cluster_id for cluster_id, story in self.stories.items() if story[1] < horizon]:
+            for key in self.stories.pop(cluster_id)[2]:
+                if self.buckets.get(key) == cluster_id:
+                    del self.buckets[key]
+    
+    def catch_up(self, conn):
+        """Index items clustered by other processes (or, after invalidate, the whole window)"""
+        if self.seen is None:
+            self.seen = {table: 0 for table in FEED_TABLES.values()}
+            since = self.window_start(conn, CLUSTER_WINDOW_HOURS)
+        else:
+            since = None
+        
+        rows = []
+        for item_type, table in FEED_TABLES.items():
+            column = FEED_TIME_COLUMNS[item_type]
+            where = f'{column} >= ?' if since else 'id > ?'
+            rows += conn.execute(f'''
+                SELECT cluster_id, {self.TEXT_COLUMNS[item_type]}, epoch FROM {table}
+                WHERE {where} AND cluster_id IS NOT NULL AND epoch IS NOT NULL
+            ''', (since or self.seen[table],)).fetchall()
+        
+        for cluster_id, text, epoch in sorted(rows, key=itemgetter(2)):
+            self.index(cluster_id, self.signature(text or ''), epoch)
+        self.advance(conn)
+    
+    def advance(self, conn):
+        """Mark everything in the item tables as indexed; call after writing assigned rows"""
+        for table in FEED_TABLES.values():
+            self.seen[table] = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+    
+    def window_start(self, conn, hours):
+        """ISO timestamp hours before the newest item, or None for an empty database"""
+        newest = max((conn.execute(f'SELECT MAX({FEED_TIME_COLUMNS[item_type]}) FROM {table}').fetchone()[0] or ''
+                      for item_type, table in FEED_TABLES.items()), default='')
+        if not newest:
+            return None
+        return (datetime.fromisoformat(newest) - timedelta(hours=hours)).isoformat()
+    
+    def assign(self, conn, entries):
+        """Cluster ids for (text, epoch) entries, in order, writing their story rows"""
+        next_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM story_clusters').fetchone()[0]
+        touched = {}
+        cluster_ids = []
+        created = 0
+        for text, epoch in entries:
+            signature = self.signature(text)
+            keys = self.band_keys(signature) if signature else None
+            cluster_id = self.match(signature, keys, epoch) if signature else None
+            if cluster_id is None:
+                cluster_id, next_id = next_id, next_id + 1
+                created += 1
+            self.index(cluster_id, signature, epoch, keys)
+            
+            first, last = touched.get(cluster_id, (epoch, epoch))
+            touched[cluster_id] = (min(first, epoch), max(last, epoch))
+            cluster_ids.append(cluster_id)
+        
+        conn.executemany('''
+            INSERT INTO story_clusters (id, first_seen, last_seen) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_seen = MAX(last_seen, excluded.last_seen)
+        ''', [(cluster_id, *story) for cluster_id, story in touched.items()])
+        metrics.inc('sage_stories_created_total', created)
+        metrics.inc('sage_stories_joined_total', len(entries) - created)
+        self.prune()
+        return cluster_ids
+    
+    def stored_clusters(self, conn, item_type, keys):
+        """Cluster ids of the stored items among the given natural keys, by key"""
+        table, key = FEED_TABLES[item_type], FEED_NATURAL_KEYS[item_type]
+        keys, found = list(keys), {}
+        for offset in range(0, len(keys), FETCH_CHUNK_ROWS):
+            chunk = keys[offset:offset + FETCH_CHUNK_ROWS]
+            found.update(conn.execute(f'''
+                SELECT {key}, cluster_id FROM {table}
+                WHERE {key} IN ({', '.join('?' * len(chunk))}) AND cluster_id IS NOT NULL
+            ''', chunk))
+        return found
+    
+    def assign_rows(self, conn, tweets, emails):
+        """Append a cluster_id to validated tweet and email rows, clustering them in time order
+        
+        Rows for items already stored with a story keep it and leave the
+        index and story_clusters alone; only new items are clustered.
+        """
+        self.catch_up(conn)
+        rows = [(item_type, row) for item_type, batch in (('tweet', tweets), ('email', emails)) for row in batch]
+        stored = {item_type: self.stored_clusters(conn, item_type, [row[0] for name, row in rows if name == item_type])
+                  for item_type in FEED_TABLES}
+        
+        clustered = [None] * len(rows)
+        pending = []
+        for i, (item_type, row) in enumerate(rows):
+            cluster_id = stored[item_type].get(row[0])
+            if cluster_id is None:
+                pending.append(i)
+            else:
+                clustered[i] = row + (cluster_id,)
+        order = sorted(pending, key=lambda i: rows[i][1][self.row_fields[rows[i][0]][2]])
+        
+        entries = []
+        for i in order:
+            item_type, row = rows[i]
+            text, preview, epoch = self.row_fields[item_type]
+            entries.append((row[text] if preview is None else f'{row[text]} {row[preview] or ""}', row[epoch]))
+        
+        for i, cluster_id in zip(order, self.assign(conn, entries)):
+            clustered[i] = rows[i][1] + (cluster_id,)
+        return ([row for (item_type, _), row in zip(rows, clustered) if item_type == 'tweet'],
+                [row for (item_type, _), row in zip(rows, clustered) if item_type == 'email'])
+    
+    def backfill(self, conn):
+        """Cluster recent items written before clustering existed or by tools that skip it"""
+        since = self.window_start(conn, CLUSTER_BACKFILL_DAYS * 24)
+        if since is None:
+            return
+        
+        pending = []
+        for item_type, table in FEED_TABLES.items():
+            pending += [(table, row_id, text or '', epoch) for row_id, text, epoch in conn.execute(f'''
+                SELECT id, {self.TEXT_COLUMNS[item_type]}, epoch FROM {table}
+                WHERE {FEED_TIME_COLUMNS[item_type]} >= ? AND cluster_id IS NULL AND epoch IS NOT NULL
+            ''', (since,)).fetchall()]
+        if not pending:
+            return
+        
+        pending.sort(key=itemgetter(3))
+        cluster_ids = self.assign(conn, [(text, epoch) for _, _, text, epoch in pending])
+        for table in FEED_TABLES.values():
+            conn.executemany(f'UPDATE {table} SET cluster_id = ? WHERE id = ?',
+                             [(cluster_id, row_id) for (name, row_id, _, _), cluster_id in zip(pending, cluster_ids)
+                              if name == table])
+        print(f"🧩 Clustered {len(pending)} recent items into stories")
+
+class DemoFeedCollector:
+    # Fields accepted by ingest_batch; source_id/message_id are the natural keys
+    TWEET_INGEST_FIELDS = ('source_id', 'author_username', 'author_name', 'text', 'created_at',
+                           'likes', 'retweets', 'replies', 'sentiment', 'impact',
+                           'monetary_policy', 'market_sentiment', 'market_impact',
+                           'confidence', 'reasoning')
+    EMAIL_INGEST_FIELDS = ('message_id', 'sender', 'sender_email', 'subject', 'preview',
+                           'content', 'html_content', 'received_at', 'category',
+                           'has_attachment', 'attachments', 'links', 'content_length')
+    
+    # Columns written on ingest: the accepted fields plus precomputed render fields.
+    # Email HTML goes to email_bodies and the row keeps only its body_hash.
+    TWEET_WRITE_FIELDS = TWEET_INGEST_FIELDS + ('epoch', 'formatted_time')
+    EMAIL_WRITE_FIELDS = tuple('body_hash' if field == 'html_content' else field
+                               for field in EMAIL_INGEST_FIELDS) + ('epoch', 'formatted_time')
+    
+    # FTS5 indexes: (indexed columns, bm25 column weights)
+    SEARCH_INDEXES = {
+        'tweet': (('text', 'author_username'), (1.0, 0.5)),
+        'email': (('subject', 'preview', 'content'), (3.0, 2.0, 1.0))
+    }
+    
+    TWEET_ITEM_COLUMNS = '''id, author_username, author_name, text, created_at,
+                   likes, retweets, sentiment, impact, epoch, formatted_time, cluster_id'''
+    EMAIL_ITEM_COLUMNS = '''id, sender, sender_email, subject, preview, content,
+                   received_at, category, has_attachment, epoch, formatted_time, cluster_id'''
+    
+    TWEET_DETAIL_COLUMNS = '''id, author_username, author_name, text, created_at,
+                   likes, retweets, replies, sentiment, impact,
+                   monetary_policy, market_sentiment, market_impact,
+                   confidence, reasoning, epoch, formatted_time'''
+    EMAIL_DETAIL_COLUMNS = '''id, sender, sender_email, subject, content, html_content,
+                   received_at, category, has_attachment, attachments, links,
+                   content_length, epoch, formatted_time,
+                   (SELECT body FROM email_bodies WHERE hash = body_hash)'''
+    
+    # Facet dimensions kept in feed_rollups, mapped to their item columns
+    ROLLUP_COLUMNS = {
+        'tweet': {'sentiment': 'sentiment', 'impact': 'impact', 'author': 'author_username'},
+        'email': {'category': 'category'}
+    }
+    
+    def __init__(self, db_path=DEMO_DB_PATH, retention_days=RETENTION_DAYS):
+        self.db_path = db_path
+        self.pool = ConnectionPool(self.db_path)
+        self.change_listeners = []
+        self.fts_enabled = False
+        self.sources = {}
         self.setup_demo_database()
+        
+        metrics.describe('sage_feed_page_rows', 'histogram', 'Items per unified feed page', ROW_BUCKETS)
+        metrics.describe('sage_source_fetch_seconds', 'histogram', 'Page fetch latency per source', LATENCY_BUCKETS)
+        metrics.describe('sage_source_last_fetch_seconds', 'gauge', 'Latency of the latest page fetch per source')
+        metrics.describe('sage_source_timeouts_total', 'counter', 'Pages served without a source that timed out')
+        metrics.describe('sage_source_errors_total', 'counter', 'Pages served without a source that failed')
+        for item_type in FEED_TABLES:
+            self.register_source(SQLiteFeedSource(self, item_type))
+        self.clusterer = StoryClusterer(self)
+        self.hot_cache = HotFeedCache(self)
+        self.sentiment = SentimentSeries(self)
+        self.detail_cache = DetailCache(self)
+        self.archive = FeedArchive(self, retention_days)
+        
+        metrics.describe('sage_db_pages', 'gauge', 'Pages in the hot database file')
+        metrics.describe('sage_db_free_pages', 'gauge', 'Free pages in the hot database file')
+        metrics.describe('sage_db_vacuums_total', 'counter', 'VACUUMs run by the maintenance scheduler')
     
     def setup_demo_database(self):
         """Create and populate demo database with sample data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            # One process at a time: workers starting together must not both seed
+            conn.execute('BEGIN IMMEDIATE')
+            self.create_schema(conn.cursor())
+            conn.commit()
+    
+    def create_schema(self, cursor):
+        """Create tables, indexes and triggers, seeding sample data into a new database"""
         
         # Create tweets table with AI analysis
         cursor.execute('''
@@ -68,22 +1783,310 @@ class DemoFeedCollector:
         )
         ''')
         
+        # Natural keys used to dedupe ingested items
+        self.ensure_column(cursor, 'tweets', 'source_id', 'TEXT')
+        self.ensure_column(cursor, 'emails', 'message_id', 'TEXT')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_tweets_source_id ON tweets(source_id)')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_emails_message_id ON emails(message_id)')
+        
+        # Email HTML lives compressed in email_bodies, deduplicated by content hash
+        self.ensure_column(cursor, 'emails', 'body_hash', 'TEXT')
+        self.setup_email_bodies(cursor)
+        
+        # Render fields computed once at write time instead of on every request
+        for table in FEED_TABLES.values():
+            self.ensure_column(cursor, table, 'epoch', 'REAL')
+            self.ensure_column(cursor, table, 'formatted_time', 'TEXT')
+        
+        # Indexes backing keyset pagination (rowid breaks timestamp ties)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON tweets(created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_emails_received_at ON emails(received_at)')
+        
+        self.setup_story_clusters(cursor)
+        self.setup_archive(cursor)
+        self.setup_change_log(cursor)
+        self.setup_search_index(cursor)
+        self.setup_rollups(cursor)
+        
         # Check if data already exists
         cursor.execute("SELECT COUNT(*) FROM tweets")
         if cursor.fetchone()[0] == 0:
             self.populate_sample_data(cursor)
         
-        conn.commit()
-        conn.close()
+        self.backfill_render_fields(cursor)
+        self.move_email_bodies(cursor)
     
-    def populate_sample_data(self, cursor):
-        """Populate database with sample tweets and emails"""
+    def ensure_column(self, cursor, table, column, declaration):
+        """Add a column to a table created by an older version of the app"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    
+    def backfill_render_fields(self, cursor):
+        """Fill epoch/formatted_time for rows written before they existed or by other tools"""
+        for table, column in (('tweets', 'created_at'), ('emails', 'received_at')):
+            cursor.execute(f"SELECT id, {column} FROM {table} WHERE epoch IS NULL")
+            updates = [render_fields(timestamp) + (row_id,) for row_id, timestamp in cursor.fetchall()]
+            if updates:
+                cursor.executemany(f"UPDATE {table} SET epoch = ?, formatted_time = ? WHERE id = ?", updates)
+    
+    def setup_email_bodies(self, cursor):
+        """Content-addressed, compressed store for email HTML
         
-        # Rich sample tweets with AI analysis
-        sample_tweets = [
-            {
-                'author': 'federalreserve',
-                'name': 'Federal Reserve',
+        Identical newsletters share one row. A body is dropped once no email
+        references it; ingest_batch writes bodies after the emails so a body
+        reused within the same batch is put back.
+        """
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_bodies (
+            hash TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            raw_length INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_emails_body_hash ON emails(body_hash)')
+        
+        for event, target in (('delete', 'DELETE'), ('update', 'UPDATE OF body_hash')):
+            cursor.execute(f"DROP TRIGGER IF EXISTS emails_body_{event}")
+            cursor.execute(f'''
+            CREATE TRIGGER emails_body_{event} AFTER {target} ON emails
+            WHEN OLD.body_hash IS NOT NULL {"AND OLD.body_hash IS NOT NEW.body_hash" if event == 'update' else ""}
+            BEGIN
+                DELETE FROM email_bodies
+                WHERE hash = OLD.body_hash
+                  AND NOT EXISTS (SELECT 1 FROM emails WHERE body_hash = OLD.body_hash);
+            END
+            ''')
+    
+    def move_email_bodies(self, cursor):
+        """Move HTML still stored inline in emails.html_content into email_bodies"""
+        cursor.execute("SELECT id, html_content FROM emails WHERE html_content IS NOT NULL")
+        rows = cursor.fetchall()
+        for email_id, html_content in rows:
+            body = self.compress_body(html_content)
+            cursor.execute("INSERT OR IGNORE INTO email_bodies (hash, body, raw_length) VALUES (?, ?, ?)", body)
+            cursor.execute("UPDATE emails SET body_hash = ?, html_content = NULL WHERE id = ?",
+                           (body[0], email_id))
+    
+    def compress_body(self, html_content):
+        """(hash, compressed body, raw length) row for email_bodies"""
+        raw = html_content.encode('utf-8')
+        return (hashlib.sha256(raw).hexdigest(),
+                zlib.compress(raw, EMAIL_BODY_COMPRESSION_LEVEL),
+                len(raw))
+    
+    def setup_story_clusters(self, cursor):
+        """Stories of near-duplicate items, assigned at ingest (see StoryClusterer)"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS story_clusters (
+            id INTEGER PRIMARY KEY,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        )
+        ''')
+        for item_type, table in FEED_TABLES.items():
+            self.ensure_column(cursor, table, 'cluster_id', 'INTEGER')
+            # Covers the per-story head and member count lookups of collapsed pages
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_cluster '
+                           f'ON {table}(cluster_id, {FEED_TIME_COLUMNS[item_type]})')
+    
+    def setup_archive(self, cursor):
+        """Tables tracking archived months and marking archive moves (see FeedArchive)"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_partitions (
+            month TEXT PRIMARY KEY,
+            archived_before TEXT NOT NULL,
+            items INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        # Holds a row only inside an archive move's transaction
+        cursor.execute('CREATE TABLE IF NOT EXISTS archiving (started REAL)')
+        # Natural keys of archived items, so ingest leaves them in the archive
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_keys (
+            item_type TEXT NOT NULL,
+            natural_key TEXT NOT NULL,
+            PRIMARY KEY (item_type, natural_key)
+        ) WITHOUT ROWID
+        ''')
+        # Partition month of each archived item, so detail lookups open only the one holding it
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_ids (
+            item_type TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            PRIMARY KEY (item_type, item_id)
+        ) WITHOUT ROWID
+        ''')
+    
+    def setup_change_log(self, cursor):
+        """Track inserts, updates and deletes in a monotonically increasing change log
+        
+        Each item keeps only its latest entry: the triggers drop the old row
+        and AUTOINCREMENT hands out a fresh, never reused seq. The current max seq
+        is the feed's high-water mark for deltas and ETags.
+        """
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_type TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            UNIQUE (item_type, item_id)
+        )
+        ''')
+        
+        for item_type, table in FEED_TABLES.items():
+            for event, op, row in (('INSERT', 'upsert', 'NEW'),
+                                   ('UPDATE', 'upsert', 'NEW'),
+                                   ('DELETE', 'delete', 'OLD')):
+                # Recreated on startup so older databases pick up the current definition.
+                # DELETE + INSERT rather than INSERT OR REPLACE: an outer upsert's
+                # conflict policy would override the trigger's REPLACE.
+                # Archive moves are not deletes as far as feed clients are concerned
+                skip_archive = 'WHEN NOT EXISTS (SELECT 1 FROM archiving)' if event == 'DELETE' else ''
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_log_{event.lower()}")
+                cursor.execute(f'''
+                CREATE TRIGGER {table}_log_{event.lower()}
+                AFTER {event} ON {table} {skip_archive}
+                BEGIN
+                    DELETE FROM feed_changes
+                    WHERE item_type = '{item_type}' AND item_id = {row}.id;
+                    INSERT INTO feed_changes (item_type, item_id, op)
+                    VALUES ('{item_type}', {row}.id, '{op}');
+                END
+                ''')
+        
+        # Databases created before the change log existed start with every row logged once
+        cursor.execute("SELECT COUNT(*) FROM feed_changes")
+        if cursor.fetchone()[0] == 0:
+            for item_type, table in FEED_TABLES.items():
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO feed_changes (item_type, item_id, op)
+                    SELECT '{item_type}', id, 'upsert' FROM {table} ORDER BY id
+                ''')
+    
+    def setup_rollups(self, cursor):
+        """Keep hourly item counts per facet value in feed_rollups
+        
+        Triggers add or remove one count per dimension as rows are written,
+        so counts and facets are read in O(buckets) instead of scanning the
+        item tables. Buckets are the 'YYYY-MM-DDTHH' prefix of the item time.
+        """
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_rollups (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (dimension, bucket, value)
+        ) WITHOUT ROWID
+        ''')
+        
+        for item_type, table in FEED_TABLES.items():
+            dimensions = self.rollup_dimensions(item_type)
+            
+            def adjust(row, delta):
+                bucket = f"substr({row}.{FEED_TIME_COLUMNS[item_type]}, 1, 13)"
+                return '\n'.join(f'''
+                    INSERT INTO feed_rollups (dimension, bucket, value, count)
+                    VALUES ('{dimension}', COALESCE({bucket}, ''), COALESCE({expression.format(row=row)}, 'unknown'), {delta})
+                    ON CONFLICT (dimension, bucket, value) DO UPDATE SET count = count + excluded.count;'''
+                    for dimension, expression in dimensions)
+            
+            columns = ', '.join(sorted({FEED_TIME_COLUMNS[item_type], *self.ROLLUP_COLUMNS[item_type].values()}))
+            for event, body in (('insert', adjust('NEW', 1)),
+                                ('delete', adjust('OLD', -1)),
+                                ('update', adjust('OLD', -1) + adjust('NEW', 1))):
+                trigger = f'{table}_rollup_{event}'
+                target = f'UPDATE OF {columns}' if event == 'update' else event.upper()
+                # Archived items stay counted
+                skip_archive = 'WHEN NOT EXISTS (SELECT 1 FROM archiving)' if event == 'delete' else ''
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                cursor.execute(f'''
+                CREATE TRIGGER {trigger} AFTER {target} ON {table} {skip_archive}
+                BEGIN
+                    {body}
+                END
+                ''')
+        
+        # Databases created before the rollups existed are counted once
+        cursor.execute("SELECT COUNT(*) FROM feed_rollups")
+        if cursor.fetchone()[0] == 0:
+            for item_type, table in FEED_TABLES.items():
+                bucket = f"substr({FEED_TIME_COLUMNS[item_type]}, 1, 13)"
+                for dimension, expression in self.rollup_dimensions(item_type):
+                    value = expression.format(row=table)
+                    cursor.execute(f'''
+                        INSERT INTO feed_rollups (dimension, bucket, value, count)
+                        SELECT '{dimension}', COALESCE({bucket}, ''), COALESCE({value}, 'unknown'), COUNT(*)
+                        FROM {table}
+                        GROUP BY 2, 3
+                    ''')
+    
+    def rollup_dimensions(self, item_type):
+        """(dimension, SQL expression over {row}) pairs counted for an item type"""
+        return (('source', f"'{item_type}'"),
+                *((dimension, f'{{row}}.{column}')
+                  for dimension, column in self.ROLLUP_COLUMNS[item_type].items()))
+    
+    def setup_search_index(self, cursor):
+        """Create FTS5 indexes kept in sync with tweets and emails by triggers
+        
+        The indexes are external-content tables, so the text is stored once.
+        Without FTS5 support in the linked SQLite, search falls back to LIKE.
+        """
+        for item_type, (columns, _) in self.SEARCH_INDEXES.items():
+            table = FEED_TABLES[item_type]
+            index = f'{table}_fts'
+            column_list = ', '.join(columns)
+            new_values = ', '.join(f'new.{column}' for column in columns)
+            old_values = ', '.join(f'old.{column}' for column in columns)
+            
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (index,))
+            exists = cursor.fetchone() is not None
+            try:
+                cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {index}
+                USING fts5({column_list}, content='{table}', content_rowid='id')
+                ''')
+            except sqlite3.OperationalError as e:
+                print(f"⚠️  FTS5 unavailable, search will use LIKE: {e}")
+                return
+            
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+            ''')
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+            ''')
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {column_list} ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+            ''')
+            
+            if not exists:
+                cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+        
+        self.fts_enabled = True
+    
+    def populate_sample_data(self, cursor):
+        """Populate database with sample tweets and emails"""
+        
+        # Rich sample tweets with AI analysis
+        sample_tweets = [
+            {
+                'author': 'federalreserve',
+                'name': 'Federal Reserve',
                 'text': '🧵 THREAD: FOMC announces decision to maintain target range at 5.25-5.50%. Chair Powell emphasizes data-dependent approach amid persistent inflation concerns. Full statement and economic projections available.',
                 'sentiment': 'hawkish',
                 'impact': 'high',
@@ -166,8 +2169,8 @@ class DemoFeedCollector:
                 INSERT INTO tweets (author_username, author_name, text, created_at, 
                                   likes, retweets, replies, sentiment, impact,
                                   monetary_policy, market_sentiment, market_impact,
-                                  confidence, reasoning)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                  confidence, reasoning, epoch, formatted_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 tweet['author'],
                 tweet['name'],
@@ -182,7 +2185,8 @@ class DemoFeedCollector:
                 tweet.get('market_sentiment', 0),
                 tweet.get('market_impact', 0.5),
                 tweet.get('confidence', 0.7),
-                tweet.get('reasoning', 'Market analysis shows significant impact.')
+                tweet.get('reasoning', 'Market analysis shows significant impact.'),
+                *render_fields(timestamp.isoformat())
             ))
         
         # Sample emails
@@ -265,194 +2269,684 @@ class DemoFeedCollector:
         # Insert emails with varying timestamps
         for i, email_data in enumerate(sample_emails):
             timestamp = base_time - timedelta(hours=i*3, minutes=random.randint(0, 59))
+            attachments = email_data.get('attachments', [])
             cursor.execute('''
                 INSERT INTO emails (sender, sender_email, subject, preview, content,
-                                  received_at, category, has_attachment)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                  html_content, received_at, category, has_attachment,
+                                  attachments, links, content_length, epoch, formatted_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 email_data['sender'],
                 email_data['email'],
                 email_data['subject'],
                 email_data['preview'],
-                email_data['content'],
+                email_data.get('content', email_data['preview']),
+                email_data.get('html_content'),
                 timestamp.isoformat(),
                 email_data['category'],
-                email_data['attachment']
+                email_data.get('attachment', bool(attachments)),
+                json.dumps(attachments) if attachments else None,
+                json.dumps(email_data['links']) if 'links' in email_data else None,
+                len(email_data.get('html_content') or email_data.get('content', '')),
+                *render_fields(timestamp.isoformat())
             ))
     
-    def get_twitter_items(self):
-        """Get tweets from demo database"""
-        items = []
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def add_change_listener(self, listener):
+        """Register a callable run after this collector commits new or changed items"""
+        self.change_listeners.append(listener)
+    
+    def notify_changes(self):
+        for listener in self.change_listeners:
+            listener()
+    
+    def ingest_batch(self, records):
+        """Validate and upsert a batch of tweet/email records in one transaction
         
-        cursor.execute('''
-            SELECT id, author_username, author_name, text, created_at,
-                   likes, retweets, sentiment, impact
-            FROM tweets
-            ORDER BY created_at DESC
-        ''')
+        Records are dicts with a 'type' of 'tweet' or 'email' plus the
+        fields in TWEET_INGEST_FIELDS / EMAIL_INGEST_FIELDS. Items are
+        deduped on source_id / message_id, within the batch and against the
+        database. Invalid records are skipped and reported by index; records
+        for items already moved to the archive are skipped and counted.
+        """
+        start = time.perf_counter()
+        tweets, emails, bodies, errors = {}, {}, {}, []
+        archived = 0
         
-        for row in cursor.fetchall():
-            items.append({
-                'type': 'tweet',
-                'id': f'tweet_{row[0]}',
-                'author': row[1],
-                'author_name': row[2],
-                'content': row[3],
-                'timestamp': row[4],
-                'likes': row[5],
-                'retweets': row[6],
-                'sentiment': row[7],
-                'impact': row[8],
-                'source': 'Twitter'
-            })
-        
-        conn.close()
-        return items
-    
-    def get_email_items(self):
-        """Get emails from demo database"""
-        items = []
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        for index, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError('Record must be a JSON object')
+                if record.get('type') == 'tweet':
+                    row = self.validate_tweet(record)
+                    tweets[row[0]] = row
+                elif record.get('type') == 'email':
+                    row, body = self.validate_email(record)
+                    emails[row[0]] = row
+                    if body:
+                        bodies[row[0]] = body
+                else:
+                    raise ValueError("type must be 'tweet' or 'email'")
+            except (ValueError, TypeError, OverflowError) as e:
+                errors.append({'index': index, 'error': str(e)})
         
-        cursor.execute('''
-            SELECT id, sender, sender_email, subject, preview, content,
-                   received_at, category, has_attachment
-            FROM emails
-            ORDER BY received_at DESC
-        ''')
+        validated = clustered = time.perf_counter()
         
-        for row in cursor.fetchall():
-            items.append({
-                'type': 'email',
-                'id': f'email_{row[0]}',
-                'sender': row[1],
-                'sender_email': row[2],
-                'subject': row[3],
-                'preview': row[4],
-                'content': row[5],
-                'timestamp': row[6],
-                'category': row[7],
-                'has_attachment': row[8],
-                'source': 'Email'
-            })
-        
-        conn.close()
-        return items
-    
-    def get_unified_feed(self):
-        """Combine tweets and emails into unified feed"""
-        all_items = []
-        
-        # Get tweets and emails
-        tweets = self.get_twitter_items()
-        emails = self.get_email_items()
-        
-        # Combine
-        all_items.extend(tweets)
-        all_items.extend(emails)
-        
-        # Sort by timestamp
-        all_items.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Format timestamps for display
-        for item in all_items:
-            dt = datetime.fromisoformat(item['timestamp'])
-            item['time_ago'] = self.format_time_ago(dt)
-            item['formatted_time'] = dt.strftime('%b %d, %Y at %I:%M %p')
-        
-        return all_items
-    
-    def format_time_ago(self, dt):
-        """Format datetime as 'X minutes/hours/days ago'"""
-        now = datetime.now()
-        diff = now - dt
+        if tweets or emails:
+            with self.pool.connection() as conn:
+                with conn:
+                    # Story assignment reads what other processes wrote, so it takes the write lock first
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        for item_type, rows in (('tweet', tweets), ('email', emails)):
+                            for key in self.archive.archived_keys(conn, item_type, rows):
+                                del rows[key]
+                                bodies.pop(key, None)
+                                archived += 1
+                        tweet_rows, email_rows = self.clusterer.assign_rows(conn, tweets.values(), emails.values())
+                        clustered = time.perf_counter()
+                        if tweet_rows:
+                            conn.executemany(self.upsert_statement('tweets', self.TWEET_WRITE_FIELDS,
+                                                                   keep=('cluster_id',)), tweet_rows)
+                        if email_rows:
+                            conn.executemany(self.upsert_statement('emails', self.EMAIL_WRITE_FIELDS,
+                                                                   keep=('cluster_id',)), email_rows)
+                            conn.executemany("INSERT OR IGNORE INTO email_bodies (hash, body, raw_length) "
+                                             "VALUES (?, ?, ?)", bodies.values())
+                        self.clusterer.advance(conn)
+                    except Exception:
+                        # The index may now hold stories that are being rolled back
+                        self.clusterer.invalidate()
+                        raise
+            self.notify_changes()
+        
+        written = time.perf_counter()
+        
+        return {
+            'tweets': len(tweets),
+            'emails': len(emails),
+            'rejected': len(errors),
+            'archived': archived,
+            'errors': errors,
+            'timings_ms': {
+                'validate': round((validated - start) * 1000, 3),
+                'cluster': round((clustered - validated) * 1000, 3),
+                'write': round((written - clustered) * 1000, 3),
+                'total': round((written - start) * 1000, 3)
+            }
+        }
+    
+    def upsert_statement(self, table, fields, keep=()):
+        """INSERT ... ON CONFLICT DO UPDATE keyed on the first field
+        
+        keep lists extra trailing columns that are written on insert but
+        never overwritten once set.
+        """
+        fields = tuple(fields) + tuple(keep)
+        columns = ', '.join(fields)
+        placeholders = ', '.join('?' * len(fields))
+        updates = ', '.join(f'{field} = COALESCE({field}, excluded.{field})' if field in keep
+                            else f'{field} = excluded.{field}' for field in fields[1:])
+        return f'''
+            INSERT INTO {table} ({columns}) VALUES ({placeholders})
+            ON CONFLICT({fields[0]}) DO UPDATE SET {updates}
+        '''
+    
+    def validate_tweet(self, record):
+        """Return a row in TWEET_WRITE_FIELDS order, or raise ValueError"""
+        for field in ('source_id', 'author_username', 'text', 'created_at'):
+            if not record.get(field):
+                raise ValueError(f'Missing required field: {field}')
+        
+        created_at = self.normalize_timestamp(self.required_str(record, 'created_at'))
+        author_username = self.required_str(record, 'author_username')
+        return (
+            self.natural_key(record, 'source_id'),
+            author_username,
+            self.optional_str(record, 'author_name') or author_username,
+            self.required_str(record, 'text'),
+            created_at,
+            int(record.get('likes') or 0),
+            int(record.get('retweets') or 0),
+            int(record.get('replies') or 0),
+            self.optional_str(record, 'sentiment'),
+            self.optional_str(record, 'impact'),
+            self.optional_float(record.get('monetary_policy')),
+            self.optional_float(record.get('market_sentiment')),
+            self.optional_float(record.get('market_impact')),
+            self.optional_float(record.get('confidence')),
+            self.optional_str(record, 'reasoning'),
+            *render_fields(created_at)
+        )
+    
+    def validate_email(self, record):
+        """Return a row in EMAIL_WRITE_FIELDS order and its compressed body (or None), or raise ValueError"""
+        for field in ('message_id', 'sender', 'subject', 'received_at'):
+            if not record.get(field):
+                raise ValueError(f'Missing required field: {field}')
+        
+        attachments = record.get('attachments') or []
+        links = record.get('links') or []
+        if not isinstance(attachments, list) or not isinstance(links, list):
+            raise ValueError('attachments and links must be lists')
+        
+        has_attachment = record.get('has_attachment')
+        if has_attachment is None:
+            has_attachment = bool(attachments)
+        elif not isinstance(has_attachment, bool):
+            raise ValueError('has_attachment must be true or false')
+        
+        preview = self.optional_str(record, 'preview', EMAIL_PREVIEW_CHARS)
+        content = self.optional_str(record, 'content', None) or preview or ''
+        html_content = self.optional_str(record, 'html_content', None)
+        received_at = self.normalize_timestamp(self.required_str(record, 'received_at'))
+        body = self.compress_body(html_content) if html_content else None
+        
+        return (
+            self.natural_key(record, 'message_id'),
+            self.required_str(record, 'sender'),
+            self.optional_str(record, 'sender_email'),
+            self.required_str(record, 'subject'),
+            preview or content[:EMAIL_PREVIEW_CHARS],
+            content,
+            body[0] if body else None,
+            received_at,
+            self.optional_str(record, 'category'),
+            has_attachment,
+            json.dumps(attachments) if attachments else None,
+            json.dumps(links) if links else None,
+            len(html_content or content),
+            *render_fields(received_at)
+        ), body
+    
+    def optional_float(self, value):
+        if value is None:
+            return None
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f'Not a finite number: {value}')
+        return value
+    
+    def natural_key(self, record, field):
+        """A source_id / message_id: a string or integer of at most INGEST_KEY_CHARS"""
+        value = record[field]
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            raise ValueError(f'{field} must be a string or integer')
+        if len(value) > INGEST_KEY_CHARS:
+            raise ValueError(f'{field} is longer than {INGEST_KEY_CHARS} characters')
+        return value
+    
+    def required_str(self, record, field, limit=INGEST_TEXT_CHARS):
+        """A text field checked present by the caller, cut to limit characters"""
+        value = record[field]
+        if not isinstance(value, str):
+            raise ValueError(f'{field} must be a string')
+        return value[:limit]
+    
+    def optional_str(self, record, field, limit=INGEST_TEXT_CHARS):
+        """A text field that may be missing, cut to limit characters"""
+        value = record.get(field)
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            raise ValueError(f'{field} must be a string')
+        return value[:limit]
+    
+    def get_twitter_items(self, conn, cursor=None, newer=False, before=None):
+        """Yield (sort_key, item) pairs for tweets in feed order, past the cursor"""
+        rank = SOURCE_RANKS['tweet']
+        where, params = self.keyset_clause('created_at', rank, cursor, newer, before)
+        order = 'ASC' if newer else 'DESC'
+        
+        with Stage('sql'):
+            rows = conn.execute(f'''
+                SELECT {self.TWEET_ITEM_COLUMNS}
+                FROM tweets
+                {where}
+                ORDER BY created_at {order}, id {order}
+            ''', params)
+        
+        for row in iter_rows(rows):
+            yield (row[4], rank, row[0]), TweetItem.from_row(row)
+    
+    def get_email_items(self, conn, cursor=None, newer=False, before=None):
+        """Yield (sort_key, item) pairs for emails in feed order, past the cursor"""
+        rank = SOURCE_RANKS['email']
+        where, params = self.keyset_clause('received_at', rank, cursor, newer, before)
+        order = 'ASC' if newer else 'DESC'
+        
+        with Stage('sql'):
+            rows = conn.execute(f'''
+                SELECT {self.EMAIL_ITEM_COLUMNS}
+                FROM emails
+                {where}
+                ORDER BY received_at {order}, id {order}
+            ''', params)
+        
+        for row in iter_rows(rows):
+            yield (row[6], rank, row[0]), EmailItem.from_row(row)
+    
+    def keyset_clause(self, column, rank, cursor, newer, before=None):
+        """Build the WHERE clause selecting rows strictly past a (timestamp, rank, id) cursor
+        
+        before additionally keeps only rows with a timestamp below it.
+        """
+        conditions, params = [], ()
+        if before is not None:
+            conditions.append(f'{column} < ?')
+            params = (before,)
         
-        if diff.days > 0:
-            return f"{diff.days} day{'s' if diff.days > 1 else ''} ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours} hour{'s' if hours > 1 else ''} ago"
+        if cursor is not None:
+            timestamp, cursor_rank, cursor_id = cursor
+            op = '>' if newer else '<'
+            
+            if rank == cursor_rank:
+                # Same source: compare (timestamp, id) lexicographically
+                conditions.append(f'{column} {op}= ? AND ({column} {op} ? OR id {op} ?)')
+                params += (timestamp, timestamp, cursor_id)
+            elif (rank > cursor_rank) == newer:
+                # This source sorts past the cursor at an equal timestamp
+                conditions.append(f'{column} {op}= ?')
+                params += (timestamp,)
+            else:
+                conditions.append(f'{column} {op} ?')
+                params += (timestamp,)
+        
+        return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+    
+    def get_unified_feed(self, feed_type='all', limit=DEFAULT_FEED_LIMIT, cursor=None, newer=False,
+                         collapse=False):
+        """Return one page of the feed, merging the ordered sources lazily
+        
+        Pages run newest first. With newer=True the page holds the items
+        immediately after the cursor, so polling clients never skip a gap.
+        A page served without a slow or failing source lists its item type
+        under 'degraded'. Its cursors stay at the request cursor, the last
+        key every source has covered, so the client re-requests the range
+        (a first page gets none). collapse=True serves one item per story.
+        """
+        page, degraded = None, []
+        if collapse:
+            with Stage('sources'):
+                page = self.story_page(feed_type, limit + 1, cursor, newer)
+        elif self.feed_is_local(feed_type):
+            with Stage('hot_cache'):
+                page = self.hot_cache.get_page(feed_type, limit, cursor, newer)
+        if page is None:
+            with Stage('sources'):
+                page, degraded = self.fan_out(self.feed_sources(feed_type), limit + 1, cursor, newer)
+        
+        has_more = len(page) > limit
+        page = page[:limit]
+        metrics.observe('sage_feed_page_rows', len(page), feed_type=feed_type)
+        if newer:
+            page.reverse()
+        
+        result = {
+            'items': [item for _, item in page],
+            'has_more': has_more,
+            'newer_cursor': self.encode_cursor(page[0][0]) if page else None,
+            'older_cursor': self.encode_cursor(page[-1][0]) if page else None
+        }
+        if degraded:
+            result['degraded'] = degraded
+            result['has_more'] = True
+            result['newer_cursor'] = result['older_cursor'] = (
+                self.encode_cursor(cursor) if cursor is not None else None)
+        return result
+    
+    def story_page(self, feed_type, count, cursor=None, newer=False):
+        """Read up to count (sort_key, Story) pairs past the cursor, in query order"""
+        pairs = self.collapse_stories(self.iter_feed_chunks(feed_type, cursor, newer, count), feed_type)
+        try:
+            return list(islice(pairs, count))
+        finally:
+            pairs.close()
+    
+    def collapse_stories(self, chunks, feed_type):
+        """Keep only the newest item of each story from chunks of (sort_key, item) pairs
+        
+        Items are wrapped as Story with the member count of their story
+        within the feed type. Every story therefore appears exactly once
+        across pages, at the position of its latest item. Items without a
+        story, or whose story has no members left in the hot tables, pass
+        through on their own. Chunks come from iter_feed_chunks, so no
+        source holds a pooled connection while story_heads takes one.
+        Closes chunks when done.
+        """
+        item_types = FEED_TYPE_SOURCES[feed_type]
+        try:
+            for rows in chunks:
+                heads = self.story_heads({getattr(item, 'cluster_id', None) for _, item in rows} - {None},
+                                         item_types)
+                for key, item in rows:
+                    cluster_id = getattr(item, 'cluster_id', None)
+                    head = heads.get(cluster_id)
+                    if head is None:
+                        yield key, Story(item, cluster_id, 1)
+                    elif head[0] == key:
+                        yield key, Story(item, cluster_id, head[1])
+        finally:
+            chunks.close()
+    
+    def story_heads(self, cluster_ids, item_types):
+        """{cluster_id: (sort key of its newest member, member count)} over the given item types"""
+        heads = {}
+        if not cluster_ids:
+            return heads
+        
+        ids = list(cluster_ids)
+        placeholders = ', '.join('?' * len(ids))
+        with self.pool.connection() as conn:
+            for item_type in item_types:
+                if item_type not in FEED_TABLES:
+                    continue
+                column, rank = FEED_TIME_COLUMNS[item_type], SOURCE_RANKS[item_type]
+                # id is a bare column: SQLite takes it from the row holding the MAX
+                rows = conn.execute(f'''
+                    SELECT cluster_id, COUNT(*), MAX({column}), id FROM {FEED_TABLES[item_type]}
+                    WHERE cluster_id IN ({placeholders}) GROUP BY cluster_id
+                ''', ids)
+                for cluster_id, members, timestamp, row_id in rows:
+                    key = (timestamp, rank, row_id)
+                    if cluster_id in heads:
+                        head_key, head_members = heads[cluster_id]
+                        key, members = max(key, head_key), members + head_members
+                    heads[cluster_id] = (key, members)
+        return heads
+    
+    def iter_feed_chunks(self, feed_type, cursor=None, newer=False, chunk=FETCH_CHUNK_ROWS):
+        """Yield lists of (sort_key, item) pairs past the cursor, in query order
+        
+        Starts with the hot cache window for as far as it reaches, then reads
+        chunk rows at a time. Sources are read one after another, each on a
+        single pooled connection returned before the next is taken, so a
+        reader never holds one connection while waiting for another.
+        """
+        if self.feed_is_local(feed_type):
+            with Stage('hot_cache'):
+                cached = self.hot_cache.get_prefix(feed_type, cursor, newer)
+            if cached:
+                yield cached
+                cursor = cached[-1][0]
+        
+        sources = self.feed_sources(feed_type)
+        while True:
+            pages = [self.fetch_source(source, cursor, chunk, newer) for source in sources]
+            rows = list(islice(heapq.merge(*pages, key=itemgetter(0), reverse=not newer), chunk))
+            if rows:
+                yield rows
+            if len(rows) < chunk:
+                return
+            cursor = rows[-1][0]
+    
+    def query_feed_page(self, feed_type, limit, cursor=None, newer=False):
+        """Read up to limit + 1 (sort_key, item) rows from the SQLite sources in query order"""
+        sources = [source for source in self.feed_sources(feed_type) if source.local]
+        return self.fan_out(sources, limit + 1, cursor, newer, deadline=False)[0]
+    
+    def iter_feed(self, feed_type='all', cursor=None, limit=None, newer=False):
+        """Lazily yield (sort_key, item) pairs, newest first, past the cursor
+        
+        Rows come from iter_feed_chunks, at most FETCH_CHUNK_ROWS at a time,
+        so callers streaming a response keep memory flat regardless of the
+        result size and hold no pooled connection between chunks, however
+        slowly the client reads. newer=True yields oldest first, after the
+        cursor.
+        """
+        chunk = FETCH_CHUNK_ROWS if limit is None else max(1, min(limit, FETCH_CHUNK_ROWS))
+        pairs = chain.from_iterable(self.iter_feed_chunks(feed_type, cursor, newer, chunk))
+        yield from (pairs if limit is None else islice(pairs, limit))
+    
+    def register_source(self, source):
+        """Add a FeedSource; its item type needs a SOURCE_RANKS entry for cursors"""
+        if source.item_type not in SOURCE_RANKS:
+            raise ValueError(f'No SOURCE_RANKS entry for source {source.item_type}')
+        self.sources[source.item_type] = source
+    
+    def feed_sources(self, feed_type):
+        return [self.sources[item_type] for item_type in FEED_TYPE_SOURCES.get(feed_type, ())]
+    
+    def feed_is_local(self, feed_type):
+        """True when the change log covers every source of the feed type"""
+        return all(source.local for source in self.feed_sources(feed_type))
+    
+    def fan_out(self, sources, count, cursor=None, newer=False, deadline=True):
+        """Fetch up to count pairs from each source concurrently and merge them
+        
+        Every source runs on its own threads against its own timeout, counted
+        from the start of the fan-out. One that times out or raises is left
+        out of the page and its item type returned in the degraded list;
+        deadline=False waits for all of them. A single source is read inline.
+        Returns (pairs, degraded).
+        """
+        if len(sources) == 1:
+            return self.fetch_source(sources[0], cursor, count, newer), []
+        
+        started = time.monotonic()
+        pending = [(source, source.executor.submit(self.fetch_source, source, cursor, count, newer))
+                   for source in sources]
+        pages, degraded = [], []
+        for source, future in pending:
+            timeout = None
+            if deadline and source.timeout is not None:
+                timeout = max(0.0, started + source.timeout - time.monotonic())
+            try:
+                pages.append(future.result(timeout))
+            except FetchTimeout:
+                future.cancel()
+                metrics.inc('sage_source_timeouts_total', source=source.item_type)
+                degraded.append(source.item_type)
+            except Exception as e:
+                print(f"⚠️  Feed source {source.item_type} failed: {e}")
+                metrics.inc('sage_source_errors_total', source=source.item_type)
+                degraded.append(source.item_type)
+        
+        merged = heapq.merge(*pages, key=itemgetter(0), reverse=not newer)
+        return list(islice(merged, count)), degraded
+    
+    def fetch_source(self, source, cursor, count, newer):
+        start = time.perf_counter()
+        try:
+            return source.fetch_page(cursor, count, newer)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe('sage_source_fetch_seconds', elapsed, source=source.item_type)
+            metrics.set('sage_source_last_fetch_seconds', elapsed, source=source.item_type)
+    
+    def search(self, query, feed_type='all', limit=DEFAULT_FEED_LIMIT, cursor=None):
+        """Ranked full-text search across sources, best matches first
+        
+        Results are BM25-ordered (lower scores are better matches) and carry
+        a highlighted 'snippet'. The cursor is a (score, rank, id) key.
+        """
+        match = self.fts_query(query)
+        if not match:
+            return {'items': [], 'has_more': False, 'next_cursor': None}
+        
+        with self.pool.connection() as conn:
+            merged = heapq.merge(*(self.search_source(conn, item_type, match, query, cursor, limit + 1)
+                                   for item_type in FEED_TYPE_SOURCES[feed_type]),
+                                 key=itemgetter(0))
+            page = list(islice(merged, limit + 1))
+        
+        has_more = len(page) > limit
+        page = page[:limit]
+        items = [item for _, item in page]
+        
+        next_cursor = None
+        if has_more:
+            score, rank, row_id = page[-1][0]
+            item_type = next(name for name, value in SOURCE_RANKS.items() if value == rank)
+            next_cursor = f'{score!r}|{item_type}_{row_id}'
+        
+        return {'items': items, 'has_more': has_more, 'next_cursor': next_cursor}
+    
+    def search_source(self, conn, item_type, match, query, cursor, limit):
+        """Return up to `limit` ((score, rank, id), item) matches for one source in score order
+        
+        Ranking and the LIMIT run in the FTS query on its own, so snippets
+        and item lookups only happen for the rows on the page.
+        """
+        table = FEED_TABLES[item_type]
+        rank = SOURCE_RANKS[item_type]
+        columns, weights = self.SEARCH_INDEXES[item_type]
+        item_columns = self.TWEET_ITEM_COLUMNS if item_type == 'tweet' else self.EMAIL_ITEM_COLUMNS
+        item_class = ITEM_CLASSES[item_type]
+        
+        if self.fts_enabled:
+            index = f'{table}_fts'
+            score = f"bm25({index}, {', '.join(str(weight) for weight in weights)})"
+            match_id = 'rowid'
+            opening, closing = SEARCH_HIGHLIGHT
+            source = f'''
+                SELECT rowid AS match_id, {score} AS score,
+                       snippet({index}, -1, ?, ?, '…', {SEARCH_SNIPPET_TOKENS}) AS snippet
+                FROM {index} WHERE {index} MATCH ?
+            '''
+            params = [opening, closing, match]
         else:
-            minutes = diff.seconds // 60
-            if minutes < 1:
-                return "just now"
-            return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-
-# Initialize collector
-collector = DemoFeedCollector()
-
-@app.route('/')
-def index():
-    """Main page"""
-    return render_template('index.html')
-
-@app.route('/api/feed')
-def get_feed():
-    """API endpoint to get unified feed"""
-    feed_type = request.args.get('type', 'all')
+            # LIKE fallback: unranked, every hit scores 0
+            score, match_id = '0.0', 'id'
+            like = ' OR '.join(f'{column} LIKE ?' for column in columns)
+            source = f'''
+                SELECT id AS match_id, 0.0 AS score, NULL AS snippet
+                FROM {table} WHERE ({like})
+            '''
+            params = [f'%{query.strip()}%'] * len(columns)
+        
+        if cursor is not None:
+            cursor_score, cursor_rank, cursor_id = cursor
+            if rank == cursor_rank:
+                source += f' AND ({score} > ? OR ({score} = ? AND {match_id} > ?))'
+                params += [cursor_score, cursor_score, cursor_id]
+            else:
+                source += f" AND {score} {'>=' if rank > cursor_rank else '>'} ?"
+                params.append(cursor_score)
+        
+        matches = conn.execute(f'{source} ORDER BY score, match_id LIMIT ?', params + [limit]).fetchall()
+        if not matches:
+            return []
+        
+        # Join back to the item table only for the page
+        placeholders = ', '.join('?' * len(matches))
+        rows = conn.execute(f'''
+            SELECT {item_columns} FROM {table} WHERE id IN ({placeholders})
+        ''', [match[0] for match in matches])
+        items = {row[0]: item_class.from_row(row) for row in rows}
+        
+        results = []
+        for row_id, match_score, snippet in matches:
+            item = items[row_id]
+            item.score = match_score
+            item.snippet = snippet
+            results.append(((match_score, rank, row_id), item))
+        return results
     
-    if feed_type == 'all':
-        items = collector.get_unified_feed()
-    elif feed_type == 'twitter':
-        items = collector.get_twitter_items()
-        for item in items:
-            dt = datetime.fromisoformat(item['timestamp'])
-            item['time_ago'] = collector.format_time_ago(dt)
-            item['formatted_time'] = dt.strftime('%b %d, %Y at %I:%M %p')
-    elif feed_type == 'email':
-        items = collector.get_email_items()
-        for item in items:
-            dt = datetime.fromisoformat(item['timestamp'])
-            item['time_ago'] = collector.format_time_ago(dt)
-            item['formatted_time'] = dt.strftime('%b %d, %Y at %I:%M %p')
-    else:
-        items = []
+    def fts_query(self, query):
+        """Turn free text into a safe FTS5 query: quoted terms, prefix match on the last"""
+        terms = [term.replace('"', '') for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return ''
+        return ' '.join(f'"{term}"' for term in terms) + '*'
     
-    return jsonify({'items': items, 'count': len(items)})
-
-@app.route('/api/tweet/<tweet_id>')
-def get_tweet_detail(tweet_id):
-    """Get detailed view of a tweet with AI analysis"""
-    # Extract numeric ID
-    numeric_id = tweet_id.replace('tweet_', '')
+    def decode_search_cursor(self, value):
+        """Parse a 'score|type_id' search cursor, raising ValueError if malformed"""
+        score, _, item_id = value.partition('|')
+        item_type, _, row_id = item_id.partition('_')
+        if item_type not in SOURCE_RANKS:
+            raise ValueError(f'Unknown item type: {item_type}')
+        return (float(score), SOURCE_RANKS[item_type], int(row_id))
     
-    conn = sqlite3.connect(DEMO_DB_PATH)
-    cursor = conn.cursor()
+    def get_details(self, item_ids):
+        """Detail payloads for 'tweet_<id>'/'email_<id>' ids, keyed by id
+        
+        Cache misses are read with one IN (...) query per table. Unknown or
+        malformed ids are left out of the result.
+        """
+        details, seq = self.detail_cache.get_many(item_ids)
+        
+        wanted = {item_type: [] for item_type in FEED_TABLES}
+        for item_id in dict.fromkeys(item_ids):
+            item_type, _, number = item_id.partition('_')
+            if item_id not in details and item_type in wanted and number.isdigit():
+                wanted[item_type].append(int(number))
+        
+        fetched = {}
+        with self.pool.connection() as conn:
+            self.read_details(conn, wanted, fetched)
+            # Ids not in the hot tables may have been archived
+            wanted = {item_type: [number for number in ids if f'{item_type}_{number}' not in fetched]
+                      for item_type, ids in wanted.items()}
+            located = self.archive.locate(conn, wanted) if any(wanted.values()) else {}
+        
+        for conn, ids in self.archive.partitions(located):
+            self.read_details(conn, ids, fetched)
+        
+        self.detail_cache.put_many(fetched, seq)
+        details.update(fetched)
+        return details
     
-    cursor.execute('''
-        SELECT author_username, author_name, text, created_at,
-               likes, retweets, replies, sentiment, impact,
-               monetary_policy, market_sentiment, market_impact,
-               confidence, reasoning
-        FROM tweets WHERE id = ?
-    ''', (numeric_id,))
+    def read_details(self, conn, wanted, fetched):
+        """Add detail payloads for {item_type: [numeric ids]} found through conn to fetched"""
+        for item_type, ids in wanted.items():
+            if not ids:
+                continue
+            columns, build = ((self.TWEET_DETAIL_COLUMNS, self.tweet_detail) if item_type == 'tweet'
+                              else (self.EMAIL_DETAIL_COLUMNS, self.email_detail))
+            rows = conn.execute(f'''
+                SELECT {columns} FROM {FEED_TABLES[item_type]}
+                WHERE id IN ({', '.join('?' * len(ids))})
+            ''', ids)
+            for row in rows:
+                fetched[f'{item_type}_{row[0]}'] = build(row)
     
-    row = cursor.fetchone()
-    conn.close()
+    def compact(self):
+        """Checkpoint the WAL and VACUUM once free pages reach VACUUM_FREE_RATIO; True if vacuumed"""
+        with self.pool.connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            metrics.set('sage_db_pages', pages)
+            metrics.set('sage_db_free_pages', free)
+            
+            vacuum = pages > 0 and free / pages >= VACUUM_FREE_RATIO
+            if vacuum:
+                conn.execute('VACUUM')
+                # VACUUM rewrites the file through the WAL
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                metrics.inc('sage_db_vacuums_total')
+                metrics.set('sage_db_pages', conn.execute('PRAGMA page_count').fetchone()[0])
+                metrics.set('sage_db_free_pages', 0)
+            conn.execute('PRAGMA optimize')
+        return vacuum
     
-    if row:
-        dt = datetime.fromisoformat(row[3])
+    def tweet_detail(self, row):
+        """Detail payload for a TWEET_DETAIL_COLUMNS row, with AI analysis"""
+        epoch, formatted_time = row[15], row[16]
+        if epoch is None:
+            epoch, formatted_time = render_fields(row[4])
         
         # Format AI analysis percentages
-        monetary_score = row[9] if row[9] else 0
-        market_sent = row[10] if row[10] else 0
-        market_imp = row[11] if row[11] else 0
-        conf = row[12] if row[12] else 0
-        
-        return jsonify({
-            'author': row[0],
-            'author_name': row[1],
-            'content': row[2],
-            'timestamp': row[3],
-            'formatted_time': dt.strftime('%b %d, %Y at %I:%M %p'),
-            'likes': row[4],
-            'retweets': row[5],
-            'replies': row[6],
-            'sentiment': row[7],
-            'impact': row[8],
+        monetary_score = row[10] if row[10] else 0
+        market_sent = row[11] if row[11] else 0
+        market_imp = row[12] if row[12] else 0
+        conf = row[13] if row[13] else 0
+        
+        return {
+            'author': row[1],
+            'author_name': row[2],
+            'content': row[3],
+            'timestamp': row[4],
+            'epoch': epoch,
+            'formatted_time': formatted_time,
+            'likes': row[5],
+            'retweets': row[6],
+            'replies': row[7],
+            'sentiment': row[8],
+            'impact': row[9],
             'ai_analysis': {
                 'monetary_policy': {
                     'value': monetary_score,
@@ -473,58 +2967,1094 @@ def get_tweet_detail(tweet_id):
                     'value': conf,
                     'percentage': int(conf * 100)
                 },
-                'reasoning': row[13] if row[13] else 'AI analysis shows this tweet contains market-relevant information.'
+                'reasoning': row[14] if row[14] else 'AI analysis shows this tweet contains market-relevant information.'
             }
-        })
-    
-    return jsonify({'error': 'Tweet not found'}), 404
-
-@app.route('/api/email/<email_id>')
-def get_email_detail(email_id):
-    """Get detailed view of an email with rich HTML content"""
-    # Extract numeric ID
-    numeric_id = email_id.replace('email_', '')
+        }
     
-    conn = sqlite3.connect(DEMO_DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT sender, sender_email, subject, content, html_content,
-               received_at, category, has_attachment, attachments, links,
-               content_length
-        FROM emails WHERE id = ?
-    ''', (numeric_id,))
-    
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        dt = datetime.fromisoformat(row[5])
+    def email_detail(self, row):
+        """Detail payload for an EMAIL_DETAIL_COLUMNS row, with rich HTML content"""
+        epoch, formatted_time = row[12], row[13]
+        if epoch is None:
+            epoch, formatted_time = render_fields(row[6])
+        
+        # HTML is decompressed only here, never on the list paths
+        html_content = row[5]
+        if html_content is None and row[14] is not None:
+            html_content = zlib.decompress(row[14]).decode('utf-8')
         
         # Parse JSON fields
-        attachments = json.loads(row[8]) if row[8] else []
-        links = json.loads(row[9]) if row[9] else []
+        attachments = json.loads(row[9]) if row[9] else []
+        links = json.loads(row[10]) if row[10] else []
         
-        return jsonify({
-            'sender': row[0],
-            'sender_email': row[1],
-            'subject': row[2],
-            'content': row[3],
-            'rendered_content': row[4],  # The rich HTML content!
-            'timestamp': row[5],
-            'formatted_time': dt.strftime('%b %d, %Y at %I:%M %p'),
-            'category': row[6],
-            'has_attachment': row[7],
+        return {
+            'sender': row[1],
+            'sender_email': row[2],
+            'subject': row[3],
+            'content': row[4],
+            'rendered_content': html_content,  # The rich HTML content!
+            'timestamp': row[6],
+            'epoch': epoch,
+            'formatted_time': formatted_time,
+            'category': row[7],
+            'has_attachment': row[8],
             'attachments': attachments,
             'attachment_count': len(attachments),
             'extracted_links': links,
             'link_count': len(links),
-            'content_length': row[10],
+            'content_length': row[11],
             'content_type': 'html'
-        })
+        }
+    
+    def time_range_start(self, name):
+        """Start of a named time range in the stored timestamp format, or None if unknown"""
+        now = datetime.now()
+        if name == 'today':
+            return now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        if name in TIME_RANGES:
+            return (now - TIME_RANGES[name]).isoformat()
+        return None
+    
+    def count_since(self, conn, since):
+        """Items per type at or after `since`
+        
+        Whole hours come from the rollups; only the partial first hour is
+        counted from the item tables, through their time indexes.
+        """
+        first_hour = datetime.fromisoformat(since).replace(minute=0, second=0, microsecond=0)
+        next_hour = (first_hour + timedelta(hours=1)).isoformat()
+        
+        counts = dict(conn.execute('''
+            SELECT value, SUM(count) FROM feed_rollups
+            WHERE dimension = 'source' AND bucket >= ?
+            GROUP BY value
+        ''', (next_hour[:13],)).fetchall())
+        
+        for item_type, table in FEED_TABLES.items():
+            column = FEED_TIME_COLUMNS[item_type]
+            partial = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} >= ? AND {column} < ?",
+                                   (since, next_hour)).fetchone()[0]
+            counts[item_type] = counts.get(item_type, 0) + partial
+        return counts
+    
+    def range_totals(self, counts):
+        return {
+            'total': counts.get('tweet', 0) + counts.get('email', 0),
+            'twitter': counts.get('tweet', 0),
+            'email': counts.get('email', 0)
+        }
+    
+    def get_time_range_counts(self, hours=48):
+        """Item counts for every named time range plus per-hour counts for the last `hours`"""
+        since = (datetime.now() - timedelta(hours=hours)).isoformat()
+        with self.pool.connection() as conn:
+            counts = {name: self.range_totals(self.count_since(conn, self.time_range_start(name)))
+                      for name in TIME_RANGE_LABELS}
+            rows = conn.execute('''
+                SELECT bucket, value, count FROM feed_rollups
+                WHERE dimension = 'source' AND bucket >= ? AND count > 0
+                ORDER BY bucket
+            ''', (since[:13],)).fetchall()
+        
+        hourly = {}
+        for bucket, item_type, count in rows:
+            hourly.setdefault(bucket, {})[item_type] = count
+        
+        return {
+            'counts': counts,
+            'hourly': [{'hour': f'{bucket}:00:00', **self.range_totals(bucket_counts)}
+                       for bucket, bucket_counts in hourly.items()]
+        }
+    
+    def facet_counts(self, conn, since=None):
+        """Counts per value of every rollup dimension except source, largest first
+        
+        With `since`, counting starts at the beginning of since's hour.
+        """
+        where, params = ('AND bucket >= ?', (since[:13],)) if since else ('', ())
+        rows = conn.execute(f'''
+            SELECT dimension, value, SUM(count) AS total FROM feed_rollups
+            WHERE dimension != 'source' {where}
+            GROUP BY dimension, value
+            HAVING total > 0
+            ORDER BY dimension, total DESC, value
+        ''', params).fetchall()
+        
+        facets = {dimension: [] for columns in self.ROLLUP_COLUMNS.values() for dimension in columns}
+        for dimension, value, count in rows:
+            if len(facets[dimension]) < FACET_LIMIT:
+                facets[dimension].append({'value': value, 'count': count})
+        return facets
+    
+    def get_facets(self, since=None):
+        with self.pool.connection() as conn:
+            return self.facet_counts(conn, since)
+    
+    def get_stats(self):
+        """Feed totals, last-24h totals and facets, all answered from the rollups"""
+        with self.pool.connection() as conn:
+            totals = dict(conn.execute('''
+                SELECT value, SUM(count) FROM feed_rollups
+                WHERE dimension = 'source'
+                GROUP BY value
+            ''').fetchall())
+            recent = self.count_since(conn, self.time_range_start('24h'))
+            facets = self.facet_counts(conn)
+            months, archived, archived_before = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(items), 0), MAX(archived_before) FROM archive_partitions'
+            ).fetchone()
+        
+        return {
+            **self.range_totals(totals),
+            'last_24h': self.range_totals(recent),
+            'facets': facets,
+            'archive': {'months': months, 'items': archived, 'archived_before': archived_before}
+        }
+    
+    def get_time_range(self, name, feed_type='all', limit=DEFAULT_FEED_LIMIT):
+        """Newest items inside a named time range with the range's total counts"""
+        start = self.time_range_start(name)
+        pairs = self.iter_feed(feed_type, limit=limit + 1)
+        try:
+            page = list(islice(takewhile(lambda pair: pair[0][0] >= start, pairs), limit + 1))
+        finally:
+            pairs.close()
+        
+        with self.pool.connection() as conn:
+            counts = self.range_totals(self.count_since(conn, start))
+        if feed_type != 'all':
+            counts['total'] = counts[feed_type]
+        
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            'items': [item for _, item in page],
+            'has_more': has_more,
+            'older_cursor': self.encode_cursor(page[-1][0]) if page else None,
+            'stats': {
+                'time_range': name,
+                'time_range_label': TIME_RANGE_LABELS[name],
+                'start': start,
+                **counts
+            }
+        }
+    
+    def get_change_seq(self):
+        """Current high-water mark of the change log"""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM feed_changes").fetchone()[0]
+    
+    def get_feed_changes(self, since=0, feed_type='all', limit=DEFAULT_FEED_LIMIT):
+        """Return items inserted or updated after change seq `since`, newest first
+        
+        Changes are read in seq order, so when has_more is set the client
+        resumes from the returned cursor without missing anything.
+        """
+        item_types = FEED_TYPE_SOURCES[feed_type]
+        with self.pool.connection() as conn:
+            high_water = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM feed_changes").fetchone()[0]
+            placeholders = ', '.join('?' * len(item_types))
+            # +item_type keeps the planner on the seq range rather than the
+            # (item_type, item_id) index, which would scan every item of the type
+            changes = conn.execute(f'''
+                SELECT seq, item_type, item_id, op FROM feed_changes
+                WHERE seq > ? AND seq <= ? AND +item_type IN ({placeholders})
+                ORDER BY seq
+                LIMIT ?
+            ''', (since, high_water, *item_types, limit + 1)).fetchall()
+            
+            has_more = len(changes) > limit
+            changes = changes[:limit]
+            
+            upserted = {item_type: [] for item_type in item_types}
+            deleted = []
+            for _, item_type, item_id, op in changes:
+                if op == 'delete':
+                    deleted.append(f'{item_type}_{item_id}')
+                else:
+                    upserted[item_type].append(item_id)
+            
+            items = []
+            for item_type, ids in upserted.items():
+                if ids:
+                    items.extend(self.get_items_by_id(conn, item_type, ids))
+        
+        items.sort(key=FeedItem.sort_key, reverse=True)
+        
+        return {
+            'items': items,
+            'deleted': deleted,
+            'has_more': has_more,
+            'cursor': changes[-1][0] if has_more else high_water
+        }
+    
+    def get_items_by_id(self, conn, item_type, ids):
+        """Fetch feed items of one type by numeric id"""
+        placeholders = ', '.join('?' * len(ids))
+        if item_type == 'tweet':
+            rows = conn.execute(f'''
+                SELECT {self.TWEET_ITEM_COLUMNS} FROM tweets WHERE id IN ({placeholders})
+            ''', ids)
+            return [TweetItem.from_row(row) for row in rows]
+        
+        rows = conn.execute(f'''
+            SELECT {self.EMAIL_ITEM_COLUMNS} FROM emails WHERE id IN ({placeholders})
+        ''', ids)
+        return [EmailItem.from_row(row) for row in rows]
+    
+    def encode_cursor(self, sort_key):
+        """Encode a (timestamp, rank, id) sort key as 'timestamp|type_id'"""
+        timestamp, rank, row_id = sort_key
+        item_type = next(name for name, value in SOURCE_RANKS.items() if value == rank)
+        return f'{timestamp}|{item_type}_{row_id}'
+    
+    def decode_cursor(self, value, newer=False):
+        """Parse 'timestamp' or 'timestamp|type_id' into a sort key
+        
+        A bare timestamp excludes every item at that exact timestamp.
+        Raises ValueError for malformed cursors.
+        """
+        timestamp, _, item_id = value.partition('|')
+        timestamp = self.normalize_timestamp(timestamp)
+        
+        if not item_id:
+            # Sentinel ranks sort before/after every source
+            return (timestamp, len(SOURCE_RANKS) if newer else -1, 0)
+        
+        item_type, _, row_id = item_id.partition('_')
+        if item_type not in SOURCE_RANKS:
+            raise ValueError(f'Unknown item type: {item_type}')
+        return (timestamp, SOURCE_RANKS[item_type], int(row_id))
+    
+    def normalize_timestamp(self, value):
+        """Convert client ISO timestamps (e.g. JS toISOString) to the stored local format"""
+        dt = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        if dt.tzinfo is not None:
+            dt = dt.astimezone().replace(tzinfo=None)
+        return dt.isoformat()
+    
+class FeedBroadcaster:
+    """Fan feed changes out to every connected stream client
+    
+    A single watcher thread reads each change from SQLite once, serializes
+    it once per feed type and hands it to every subscriber queue. Queues are
+    bounded: a client that falls behind has its backlog dropped and is told
+    to resync from its last event id instead of holding memory for it.
+    """
+    
+    def __init__(self, collector, max_clients=MAX_STREAMS):
+        self.collector = collector
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.wakeup = threading.Event()
+        self.watcher = None
+        self.last_seq = 0
+        collector.add_change_listener(self.notify)
+        
+        metrics.describe('sage_streams_refused_total', 'counter', 'Streams refused with 503 at the per-process limit')
+    
+    def subscribe(self):
+        """Register a client queue, starting the watcher on first use
+        
+        Returns None once max_clients streams are open: every stream ties up
+        a server thread, and they must not take all of them.
+        """
+        client = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        with self.lock:
+            if len(self.subscribers) >= self.max_clients:
+                return None
+            self.subscribers.add(client)
+            if self.watcher is None:
+                self.last_seq = self.collector.get_change_seq()
+                self.watcher = threading.Thread(target=self.watch, name='feed-broadcaster', daemon=True)
+                self.watcher.start()
+        return client
+    
+    def unsubscribe(self, client):
+        with self.lock:
+            self.subscribers.discard(client)
+    
+    def notify(self):
+        """Called by in-process writers after committing to skip the poll delay"""
+        self.wakeup.set()
+    
+    def watch(self):
+        """Publish new change log entries, picking up writes from other processes too"""
+        while True:
+            self.wakeup.wait(CHANGE_POLL_SECONDS)
+            self.wakeup.clear()
+            
+            with self.lock:
+                if not self.subscribers:
+                    continue
+            
+            try:
+                if self.collector.get_change_seq() > self.last_seq:
+                    self.publish_pending()
+            except sqlite3.Error as e:
+                print(f"⚠️  Feed broadcaster error: {e}")
+    
+    def publish_pending(self):
+        """Read changes past last_seq once and broadcast them per feed type"""
+        has_more = True
+        while has_more:
+            changes = self.collector.get_feed_changes(self.last_seq, 'all', MAX_FEED_LIMIT)
+            
+            payloads = {}
+            for feed_type, item_types in FEED_TYPE_SOURCES.items():
+                items = [item for item in changes['items'] if item.item_type in item_types]
+                deleted = [item_id for item_id in changes['deleted']
+                           if item_id.partition('_')[0] in item_types]
+                if items or deleted:
+                    payloads[feed_type] = dumps_json(dict(changes, items=items, deleted=deleted,
+                                                          count=len(items)))
+            
+            self.publish(changes['cursor'], payloads)
+            self.last_seq, has_more = changes['cursor'], changes['has_more']
+    
+    def publish(self, seq, payloads):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        
+        for client in subscribers:
+            try:
+                client.put_nowait((seq, payloads))
+            except queue.Full:
+                # Backpressure: drop the backlog, the client replays from the database
+                with client.mutex:
+                    client.queue.clear()
+                client.put_nowait((seq, None))
+
+# The current app's collector, broadcaster and precompressed pages, set up by create_app()
+collector = LocalProxy(lambda: current_app.extensions['sage']['collector'])
+broadcaster = LocalProxy(lambda: current_app.extensions['sage']['broadcaster'])
+pages = LocalProxy(lambda: current_app.extensions['sage']['pages'])
+exports = LocalProxy(lambda: current_app.extensions['sage']['exports'])
+
+def negotiate_encoding():
+    """Best content coding the client accepts from CONTENT_ENCODINGS, or None"""
+    return request.accept_encodings.best_match(CONTENT_ENCODINGS)
+
+def encode_body(data, encoding, precompress=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if precompress else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if precompress else GZIP_LEVEL, mtime=0)
+
+class RequestProfiler:
+    """Opt-in profile of a single request, written to SAGE_PROFILE_DIR
+    
+    A request sent with 'X-Sage-Profile: cprofile' is profiled with cProfile
+    and dumped as a pstats .prof file (snakeviz, pstats). With pyinstrument
+    installed, 'X-Sage-Profile: pyinstrument' writes an HTML report instead.
+    The response names the file in the same header. Profiling stays off
+    unless SAGE_PROFILE_DIR is configured.
+    """
+    KINDS = ('cprofile', 'pyinstrument') if pyinstrument is not None else ('cprofile',)
+    sequence = count(1)
+    
+    def __init__(self, kind):
+        self.kind = kind
+        self.profiler = pyinstrument.Profiler() if kind == 'pyinstrument' else cProfile.Profile()
+    
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+    
+    def stop(self, directory, endpoint):
+        """Stop profiling and write the report, returning its file name"""
+        if self.kind == 'pyinstrument':
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        
+        extension = 'html' if self.kind == 'pyinstrument' else 'prof'
+        name = f'{endpoint}-{int(time.time())}-{os.getpid()}-{next(self.sequence)}.{extension}'
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        if self.kind == 'pyinstrument':
+            with open(path, 'w') as f:
+                f.write(self.profiler.output_html())
+        else:
+            self.profiler.dump_stats(path)
+        return name
+
+metrics.describe('sage_request_seconds', 'histogram', 'Request latency per endpoint (until the body starts)',
+                 LATENCY_BUCKETS)
+metrics.describe('sage_response_bytes', 'histogram', 'Response size per endpoint as sent, unless streamed',
+                 SIZE_BUCKETS)
+
+@bp.before_app_request
+def start_request_timer():
+    g.sage_started = time.perf_counter()
+    request_stages.set({})
+    
+    kind = request.headers.get(PROFILE_HEADER)
+    if kind in RequestProfiler.KINDS and current_app.config.get('SAGE_PROFILE_DIR'):
+        profiler = RequestProfiler(kind)
+        try:
+            profiler.start()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process
+            return
+        g.sage_profiler = profiler
+
+@bp.after_app_request
+def record_request(response):
+    """Observe latency and size, and report stage timings in Server-Timing
+    
+    Registered before compress_response, so it runs after it and sees the
+    encoded body and the compress stage.
+    """
+    if 'sage_started' not in g:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    
+    profiler = g.pop('sage_profiler', None)
+    if profiler is not None:
+        response.headers[PROFILE_HEADER] = profiler.stop(current_app.config['SAGE_PROFILE_DIR'], endpoint)
+    
+    elapsed = time.perf_counter() - g.sage_started
+    metrics.observe('sage_request_seconds', elapsed, endpoint=endpoint)
+    if response.content_length is not None:
+        metrics.observe('sage_response_bytes', response.content_length, endpoint=endpoint)
+    
+    stages = request_stages.get() or {}
+    request_stages.set(None)
+    timings = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in stages.items()]
+    timings.append(f'total;dur={elapsed * 1000:.2f}')
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+metrics.describe('sage_compression_responses_total', 'counter', 'Responses sent with a content coding')
+metrics.describe('sage_compression_bytes_in_total', 'counter', 'Bytes before compression')
+metrics.describe('sage_compression_bytes_out_total', 'counter', 'Bytes after compression')
+metrics.describe('sage_compression_seconds_total', 'counter', 'CPU time spent compressing responses')
+
+@bp.after_app_request
+def compress_response(response):
+    """gzip/brotli-encode buffered text responses of at least COMPRESS_MIN_BYTES
+    
+    Streamed responses (SSE, exports, large feed pages) and bodies that are
+    already encoded pass through untouched.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    data = response.get_data()
+    if encoding is None or len(data) < COMPRESS_MIN_BYTES:
+        return response
+    
+    start = time.perf_counter()
+    with Stage('compress'):
+        body = encode_body(data, encoding)
+    elapsed = time.perf_counter() - start
+    
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    metrics.inc('sage_compression_responses_total', encoding=encoding, source='dynamic')
+    metrics.inc('sage_compression_bytes_in_total', len(data), encoding=encoding, source='dynamic')
+    metrics.inc('sage_compression_bytes_out_total', len(body), encoding=encoding, source='dynamic')
+    metrics.inc('sage_compression_seconds_total', elapsed, encoding=encoding)
+    return response
+
+class PrecompressedPage:
+    """A rendered template kept in memory with an encoded variant per content coding
+    
+    Each variant has its own strong ETag, so clients revalidate with a 304
+    after PAGE_MAX_AGE_SECONDS without the page being rendered again.
+    """
+    
+    def __init__(self, name, body):
+        self.name = name
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {None: body}
+        for encoding in CONTENT_ENCODINGS:
+            self.variants[encoding] = encode_body(body, encoding, precompress=True)
+            metrics.set('sage_precompressed_page_bytes', len(self.variants[encoding]),
+                        page=name, encoding=encoding)
+        metrics.set('sage_precompressed_page_bytes', len(body), page=name, encoding='identity')
+    
+    def response(self):
+        encoding = negotiate_encoding()
+        etag = f'{self.etag}-{encoding}' if encoding else self.etag
+        
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            body = self.variants[encoding]
+            response = current_app.response_class(body, mimetype='text/html')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+                metrics.inc('sage_compression_responses_total', encoding=encoding, source='precompressed')
+                metrics.inc('sage_compression_bytes_in_total', len(self.variants[None]),
+                            encoding=encoding, source='precompressed')
+                metrics.inc('sage_compression_bytes_out_total', len(body),
+                            encoding=encoding, source='precompressed')
+        
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = PAGE_MAX_AGE_SECONDS
+        return response
+
+metrics.describe('sage_precompressed_page_bytes', 'gauge', 'Size of each precompressed page variant')
+
+def precompress_pages(app):
+    """Render the static templates once and keep their encoded variants"""
+    with app.app_context():
+        return {name: PrecompressedPage(name, render_template(name).encode('utf-8'))
+                for name in PRECOMPRESSED_TEMPLATES}
+
+@bp.route('/')
+def index():
+    """Main page"""
+    return pages['index.html'].response()
+
+def feed_etag(view):
+    """Answer feed requests with 304 while the change log high-water mark is unchanged
+    
+    The ETag covers the change seq and the full request path. The seq comes
+    from the hot cache, so an idle poll usually never touches SQLite.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not collector.feed_is_local(request.args.get('type', 'all')):
+            # Sources outside SQLite change without touching the change log
+            return view(*args, **kwargs)
+        
+        seq = collector.hot_cache.current_seq()
+        etag = f'feed-{seq}-{zlib.crc32(request.full_path.encode()):08x}'
+        
+        # Weak: the same tag covers the gzip, brotli and identity encodings
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.cache_control.no_store:
+                return response
+        
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    return wrapper
+
+def parse_limit(maximum=MAX_FEED_LIMIT):
+    """Read the page size from the query string, clamped to maximum"""
+    limit = request.args.get('limit', DEFAULT_FEED_LIMIT, type=int)
+    return max(1, min(limit, maximum))
+
+def stream_json_page(pairs, limit=None):
+    """Write a feed page as JSON chunk by chunk from (sort_key, item) pairs
+    
+    The body has the same shape as a buffered /api/feed page; count,
+    has_more and the cursors follow the items array. Pass limit + 1 pairs
+    to detect has_more. The pairs generator is closed when the response
+    ends, so a dropped client releases its pooled connection.
+    """
+    yield '{"success":true,"items":['
+    
+    count, newer_key, older_key, has_more = 0, None, None, False
+    try:
+        for chunk in iter(lambda: list(islice(pairs, FETCH_CHUNK_ROWS)), []):
+            if limit is not None and count + len(chunk) > limit:
+                has_more = True
+                chunk = chunk[:limit - count]
+                if not chunk:
+                    break
+            
+            if newer_key is None:
+                newer_key = chunk[0][0]
+            older_key = chunk[-1][0]
+            yield (',' if count else '') + dumps_json([item for _, item in chunk])[1:-1]
+            count += len(chunk)
+    finally:
+        pairs.close()
+    
+    yield '],' + dumps_json({
+        'count': count,
+        'has_more': has_more,
+        'newer_cursor': collector.encode_cursor(newer_key) if count else None,
+        'older_cursor': collector.encode_cursor(older_key) if count else None
+    })[1:]
+
+def stream_ndjson(pairs):
+    """Write one JSON item per line, FETCH_CHUNK_ROWS lines per chunk"""
+    try:
+        for chunk in iter(lambda: list(islice(pairs, FETCH_CHUNK_ROWS)), []):
+            yield ''.join(dumps_json(item) + '\n' for _, item in chunk)
+    finally:
+        pairs.close()
+
+metrics.describe('sage_exports_refused_total', 'counter', 'Streamed responses refused with 503 at the per-process limit')
+
+def streamed_response(body, mimetype):
+    """Stream body chunk by chunk, holding one of the SAGE_MAX_EXPORTS slots until it closes
+    
+    Every open stream ties up a server thread for as long as the client
+    takes to read it, so past the limit the answer is 503 with Retry-After.
+    """
+    if not exports.acquire(blocking=False):
+        body.close()
+        metrics.inc('sage_exports_refused_total')
+        response = jsonify({'success': False, 'error': 'Too many exports in progress, retry later'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(EXPORT_RETRY_AFTER_SECONDS)
+        return response
+    
+    slot = exports._get_current_object()
+    released = []
+    
+    def release():
+        # Once, whether the body runs to the end or the response is closed first
+        if not released:
+            released.append(True)
+            slot.release()
+    
+    def chunks():
+        try:
+            yield from body
+        finally:
+            release()
+    
+    response = Response(stream_with_context(chunks()), mimetype=mimetype)
+    response.call_on_close(release)
+    return response
+
+def feed_page_response(cursor_value=None, newer=False):
+    """Serve one feed page for the current request"""
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': True, 'items': [], 'count': 0, 'has_more': False})
+    
+    cursor = None
+    if cursor_value:
+        try:
+            cursor = collector.decode_cursor(cursor_value, newer)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    collapse = request.args.get('collapse') in ('1', 'true')
+    limit = parse_limit(MAX_FEED_LIMIT if newer else MAX_STREAMED_FEED_LIMIT)
+    if limit > MAX_FEED_LIMIT:
+        # Too large to buffer: stream straight from the database cursor
+        if collapse:
+            pairs = collector.collapse_stories(collector.iter_feed_chunks(feed_type, cursor), feed_type)
+        else:
+            pairs = collector.iter_feed(feed_type, cursor, limit + 1)
+        return streamed_response(stream_json_page(pairs, limit), 'application/json')
+    
+    page = collector.get_unified_feed(feed_type, limit, cursor, newer, collapse)
+    page['count'] = len(page['items'])
+    page['success'] = True
+    response = json_response(page)
+    if 'degraded' in page:
+        # Missing a source: clients should refetch rather than revalidate it
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@bp.route('/api/feed')
+@feed_etag
+def get_feed():
+    """API endpoint to get unified feed
+    
+    Query params: type (all/twitter/email), limit, and either
+    before=<cursor> for older items or after=<cursor> for newer ones.
+    Older pages with limit above MAX_FEED_LIMIT are streamed. collapse=1
+    returns one item per story, with its cluster_id and cluster_size.
+    """
+    if request.args.get('after'):
+        return feed_page_response(request.args['after'], newer=True)
+    return feed_page_response(request.args.get('before'))
+
+@bp.route('/api/feed/older-than/<path:timestamp>')
+@feed_etag
+def get_feed_older_than(timestamp):
+    """Items strictly older than the given timestamp or cursor"""
+    return feed_page_response(timestamp)
+
+@bp.route('/api/feed/newer-than/<path:timestamp>')
+@feed_etag
+def get_feed_newer_than(timestamp):
+    """Items strictly newer than the given timestamp or cursor"""
+    return feed_page_response(timestamp, newer=True)
+
+@bp.route('/api/feed/changes')
+@feed_etag
+def get_feed_changes():
+    """Delta feed: items changed since the client's last change cursor
+    
+    Query params: since=<cursor from the previous call, 0 for everything>,
+    type and limit. Returns upserted items, deleted ids and the next cursor.
+    """
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': False, 'error': 'Unknown feed type'}), 400
+    
+    since = request.args.get('since', 0, type=int)
+    changes = collector.get_feed_changes(since, feed_type, parse_limit())
+    changes['count'] = len(changes['items'])
+    changes['success'] = True
+    return json_response(changes)
+
+@bp.route('/api/feed/counts')
+def get_feed_counts():
+    """Item counts per named time range and per hour for the last 48 hours"""
+    counts = collector.get_time_range_counts()
+    counts['success'] = True
+    return json_response(counts)
+
+@bp.route('/api/feed/timerange/<time_range>')
+def get_feed_time_range(time_range):
+    """Newest items inside a named time range (today, 1h, 24h, 48h, 7d)
+    
+    Query params: type and limit. stats carries the range's full counts;
+    page further back with /api/feed?before=<older_cursor>.
+    """
+    if time_range not in TIME_RANGE_LABELS:
+        return jsonify({'success': False, 'error': 'Unknown time range'}), 400
+    
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': False, 'error': 'Unknown feed type'}), 400
+    
+    page = collector.get_time_range(time_range, feed_type, parse_limit())
+    page['count'] = len(page['items'])
+    page['success'] = True
+    return json_response(page)
+
+@bp.route('/api/analytics/sentiment')
+def get_sentiment_analytics():
+    """Rolling confidence-weighted tweet scores, hawkish/dovish momentum and per-author aggregates
+    
+    Query params (hours, fractions allowed): window, span and step. span
+    and window may each cover at most ANALYTICS_MAX_POINTS steps.
+    """
+    window = request.args.get('window', ANALYTICS_WINDOW_HOURS, type=float)
+    span = request.args.get('span', ANALYTICS_SPAN_HOURS, type=float)
+    step = request.args.get('step', ANALYTICS_STEP_HOURS, type=float)
+    if not all(map(math.isfinite, (window, span, step))) or min(window, span, step) <= 0:
+        return jsonify({'success': False, 'error': 'window, span and step must be positive numbers'}), 400
+    if span / step > ANALYTICS_MAX_POINTS:
+        return jsonify({'success': False, 'error': f'At most {ANALYTICS_MAX_POINTS} points per request'}), 400
+    if window / step > ANALYTICS_MAX_POINTS:
+        return jsonify({'success': False, 'error': f'window may cover at most {ANALYTICS_MAX_POINTS} steps'}), 400
+    
+    analytics = collector.sentiment.analyze(window * 3600, span * 3600, step * 3600)
+    analytics.update({
+        'success': True,
+        'window_hours': window,
+        'span_hours': span,
+        'step_hours': step,
+        'engine': 'numpy' if numpy is not None else 'array'
+    })
+    return json_response(analytics)
+
+@bp.route('/api/stats')
+def get_stats():
+    """Feed totals and facet counts"""
+    stats = collector.get_stats()
+    stats['success'] = True
+    return json_response(stats)
+
+@bp.route('/api/filters')
+def get_filters():
+    """Facet values with counts for building feed filters
+    
+    Query params: range=<time range name> to count only recent items.
+    """
+    time_range = request.args.get('range')
+    since = None
+    if time_range:
+        since = collector.time_range_start(time_range)
+        if since is None:
+            return jsonify({'success': False, 'error': 'Unknown time range'}), 400
+    
+    return json_response({'success': True, 'facets': collector.get_facets(since)})
+
+def format_stream_event(seq, payload):
+    """Encode one Server-Sent Event carrying a change batch"""
+    return f'id: {seq}\nevent: changes\ndata: {payload}\n\n'
+
+@bp.route('/api/feed/stream')
+def stream_feed():
+    """Server-Sent Events stream of feed changes
+    
+    Each event carries the same payload as /api/feed/changes and its change
+    seq as the event id. Reconnecting clients send Last-Event-ID (or
+    ?last_event_id=) and first receive everything they missed. Past
+    SAGE_MAX_STREAMS open streams per process the answer is 503 with
+    Retry-After.
+    """
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': False, 'error': 'Unknown feed type'}), 400
+    
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_seq = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid Last-Event-ID'}), 400
+    
+    # Subscribe before replaying so nothing committed in between is lost
+    client = broadcaster.subscribe()
+    if client is None:
+        metrics.inc('sage_streams_refused_total')
+        response = jsonify({'success': False, 'error': 'Too many open streams, poll /api/feed/changes'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER_SECONDS)
+        return response
+    
+    def replay(since):
+        """Catch up from the database, yielding (cursor, event or None)"""
+        has_more = True
+        while has_more:
+            changes = collector.get_feed_changes(since, feed_type, MAX_FEED_LIMIT)
+            changes['count'] = len(changes['items'])
+            event = None
+            if changes['items'] or changes['deleted']:
+                event = format_stream_event(changes['cursor'], dumps_json(changes))
+            since, has_more = changes['cursor'], changes['has_more']
+            yield since, event
+    
+    def events():
+        seq = last_seq
+        try:
+            yield f'retry: {STREAM_HEARTBEAT_SECONDS * 1000}\n\n'
+            if seq is None:
+                seq = collector.get_change_seq()
+            else:
+                for seq, event in replay(seq):
+                    if event:
+                        yield event
+            
+            while True:
+                try:
+                    event_seq, payloads = client.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                
+                if event_seq <= seq:
+                    continue
+                if payloads is None:
+                    # We fell behind and our backlog was dropped
+                    for seq, event in replay(seq):
+                        if event:
+                            yield event
+                    continue
+                
+                seq = event_seq
+                if feed_type in payloads:
+                    yield format_stream_event(event_seq, payloads[feed_type])
+        finally:
+            broadcaster.unsubscribe(client)
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/api/search')
+def search():
+    """Full-text search over tweets and emails
+    
+    Query params: q, type, limit and cursor (next_cursor from the previous
+    page). Items use the feed shape plus 'score' and a highlighted 'snippet'.
+    """
+    query = request.args.get('q', '').strip()
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': False, 'error': 'Unknown feed type'}), 400
+    
+    cursor = None
+    if request.args.get('cursor'):
+        try:
+            cursor = collector.decode_search_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    try:
+        results = collector.search(query, feed_type, parse_limit(), cursor)
+    except sqlite3.OperationalError as e:
+        return jsonify({'success': False, 'error': f'Invalid search query: {e}'}), 400
+    
+    results['count'] = len(results['items'])
+    results['query'] = query
+    results['success'] = True
+    return json_response(results)
+
+@bp.route('/api/ingest', methods=['POST'])
+def ingest():
+    """Bulk ingest of newline-delimited JSON tweet/email records
+    
+    Records are written INGEST_BATCH_SIZE at a time, one transaction per
+    batch, and the response reports per-batch timings and rejected lines.
+    """
+    lines, records, errors = [], [], []
+    for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+            lines.append(line_number)
+        except ValueError as e:
+            errors.append({'line': line_number, 'error': f'Invalid JSON: {e}'})
+    
+    batches = []
+    for offset in range(0, len(records), INGEST_BATCH_SIZE):
+        result = collector.ingest_batch(records[offset:offset + INGEST_BATCH_SIZE])
+        for error in result.pop('errors'):
+            errors.append({'line': lines[offset + error['index']], 'error': error['error']})
+        batches.append(result)
+    
+    accepted = sum(batch['tweets'] + batch['emails'] for batch in batches)
+    errors.sort(key=itemgetter('line'))
+    
+    return jsonify({
+        'success': accepted > 0 or not errors,
+        'accepted': accepted,
+        'rejected': len(errors),
+        'archived': sum(batch['archived'] for batch in batches),
+        'errors': errors[:100],
+        'batches': batches
+    }), 200 if accepted > 0 or not errors else 400
+
+@bp.route('/api/export')
+def export_feed():
+    """Stream the whole feed, newest first, without buffering it
+    
+    Query params: format (ndjson/json), type, optional limit and
+    before=<cursor> to resume an interrupted export. Past SAGE_MAX_EXPORTS
+    streamed responses per process the answer is 503 with Retry-After.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'json'):
+        return jsonify({'success': False, 'error': 'Unknown export format'}), 400
+    
+    feed_type = request.args.get('type', 'all')
+    if feed_type not in FEED_TYPE_SOURCES:
+        return jsonify({'success': False, 'error': 'Unknown feed type'}), 400
+    
+    cursor = None
+    if request.args.get('before'):
+        try:
+            cursor = collector.decode_cursor(request.args['before'])
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'success': False, 'error': 'Invalid limit'}), 400
+    
+    if export_format == 'ndjson':
+        pairs = collector.iter_feed(feed_type, cursor, limit)
+        response = streamed_response(stream_ndjson(pairs), 'application/x-ndjson')
+    else:
+        pairs = collector.iter_feed(feed_type, cursor, None if limit is None else limit + 1)
+        response = streamed_response(stream_json_page(pairs, limit), 'application/json')
+    if response.status_code != 200:
+        return response
+    
+    response.headers['Content-Disposition'] = f'attachment; filename=sage-feed-{feed_type}.{export_format}'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/metrics')
+def get_metrics():
+    """Prometheus-style metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/tweet/<tweet_id>')
+def get_tweet_detail(tweet_id):
+    """Get detailed view of a tweet with AI analysis"""
+    # Accept both 'tweet_<id>' and a bare numeric id
+    item_id = f"tweet_{tweet_id.replace('tweet_', '')}"
+    detail = collector.get_details([item_id]).get(item_id)
+    if detail:
+        return jsonify(detail)
+    
+    return jsonify({'error': 'Tweet not found'}), 404
+
+@bp.route('/api/email/<email_id>')
+def get_email_detail(email_id):
+    """Get detailed view of an email with rich HTML content"""
+    # Accept both 'email_<id>' and a bare numeric id
+    item_id = f"email_{email_id.replace('email_', '')}"
+    detail = collector.get_details([item_id]).get(item_id)
+    if detail:
+        return jsonify(detail)
     
     return jsonify({'error': 'Email not found'}), 404
 
+@bp.route('/api/items', methods=['POST'])
+def get_item_details():
+    """Detail payloads for many items in one call
+    
+    Body: {"ids": ["tweet_1", "email_2", ...]} (or a bare list), at most
+    MAX_DETAIL_IDS. Returns the same payloads as /api/tweet/<id> and
+    /api/email/<id>, keyed by id, plus the ids that were not found.
+    """
+    body = request.get_json(silent=True)
+    item_ids = body.get('ids') if isinstance(body, dict) else body
+    if not isinstance(item_ids, list) or not all(isinstance(item_id, str) for item_id in item_ids):
+        return jsonify({'success': False, 'error': 'Expected a JSON list of item ids'}), 400
+    if len(item_ids) > MAX_DETAIL_IDS:
+        return jsonify({'success': False, 'error': f'At most {MAX_DETAIL_IDS} ids per request'}), 400
+    
+    details = collector.get_details(item_ids)
+    return json_response({
+        'success': True,
+        'items': details,
+        'missing': [item_id for item_id in dict.fromkeys(item_ids) if item_id not in details]
+    })
+
+def create_app(config=None, collector=None):
+    """Build the Flask app
+    
+    Nothing touches the database on import: the collector (and with it the
+    schema setup and sample data) is created here, once per process. Set
+    SAGE_DB_PATH in config or the environment to use another database, or
+    pass an existing collector to share one. SAGE_PROFILE_DIR enables
+    per-request profiles through the X-Sage-Profile header.
+    SAGE_MAX_STREAMS and SAGE_MAX_EXPORTS cap open live streams and
+    streamed exports per process. SAGE_RETENTION_DAYS moves older items
+    into monthly archive databases, checked every SAGE_MAINTENANCE_INTERVAL
+    seconds (0 disables the pass).
+    """
+    app = Flask(__name__)
+    app.secret_key = 'sage_demo_feed_2025'
+    app.config['SAGE_DB_PATH'] = os.environ.get('SAGE_DB_PATH', DEMO_DB_PATH)
+    app.config['SAGE_PROFILE_DIR'] = os.environ.get('SAGE_PROFILE_DIR')
+    app.config['SAGE_RETENTION_DAYS'] = (int(os.environ['SAGE_RETENTION_DAYS'])
+                                         if os.environ.get('SAGE_RETENTION_DAYS') else RETENTION_DAYS)
+    app.config['SAGE_MAINTENANCE_INTERVAL'] = int(os.environ.get('SAGE_MAINTENANCE_INTERVAL',
+                                                                 MAINTENANCE_INTERVAL_SECONDS))
+    app.config['SAGE_MAX_STREAMS'] = int(os.environ.get('SAGE_MAX_STREAMS', MAX_STREAMS))
+    app.config['SAGE_MAX_EXPORTS'] = int(os.environ.get('SAGE_MAX_EXPORTS', MAX_EXPORTS))
+    app.config.update(config or {})
+    
+    if collector is None:
+        collector = DemoFeedCollector(app.config['SAGE_DB_PATH'], app.config['SAGE_RETENTION_DAYS'])
+    maintenance = None
+    if collector.archive.retention_days is not None and app.config['SAGE_MAINTENANCE_INTERVAL'] > 0:
+        maintenance = MaintenanceScheduler(collector, app.config['SAGE_MAINTENANCE_INTERVAL'])
+        maintenance.start()
+    app.extensions['sage'] = {
+        'collector': collector,
+        'broadcaster': FeedBroadcaster(collector, app.config['SAGE_MAX_STREAMS']),
+        'pages': precompress_pages(app),
+        'exports': threading.BoundedSemaphore(app.config['SAGE_MAX_EXPORTS']),
+        'maintenance': maintenance
+    }
+    app.register_blueprint(bp)
+    return app
+
 if __name__ == '__main__':
     print("\n🚀 SAGE Unified Feed DEMO")
     print("=" * 50)
@@ -533,6 +4063,8 @@ if __name__ == '__main__':
     print("💾 All data stored in local SQLite database")
     print("=" * 50)
     print(f"\n✨ Starting server on http://localhost:5532")
+    print("   Development server: ./run.sh serves with gunicorn")
     print("   Press Ctrl+C to stop\n")
     
+    app = create_app()
     app.run(host='0.0.0.0', port=5532, debug=False)
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+SAGE Unified Feed - micro-benchmarks
+Each benchmark runs against a throwaway database in a temporary directory
+
+    python benchmark.py ingest --rows 20000
+    python benchmark.py search --rows 1000000
+    python benchmark.py items --rows 100000
+    python benchmark.py export --rows 200000
+    python benchmark.py sentiment --rows 1000000
+    python benchmark.py emails --rows 20000
+    python benchmark.py sources --rows 20000 --latency-ms 20
+
+The suite times the main read and write paths on one synthetic corpus and
+compares them with a stored baseline (exit status 1 on a regression):
+
+    python benchmark.py suite --compare benchmark_baseline.json
+    python benchmark.py suite --save benchmark_baseline.json
+    python benchmark.py generate --tweets 2000000 --emails 200000 --db corpus.db
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import app as sage
+
+AUTHORS = ['federalreserve', 'MarketNews', 'EconData', 'CentralBankNews', 'TradeAlert',
+           'FinanceDaily', 'PolicyWatch', 'GlobalMacro', 'EnergyDesk', 'CryptoWatch']
+SENTIMENTS = ['hawkish', 'dovish', 'neutral', 'bullish', 'bearish']
+SENTIMENT_WEIGHTS = [15, 15, 40, 15, 15]
+IMPACTS = ['low', 'medium', 'high']
+IMPACT_WEIGHTS = [50, 35, 15]
+CATEGORIES = ['newsletter', 'research', 'news', 'trading']
+CATEGORY_WEIGHTS = [45, 20, 25, 10]
+RARE_WORDS = ['stagflation', 'yieldcurve', 'taper']
+WORDS = ('fed fomc rates inflation cpi yields treasury ecb lagarde powell jobs payrolls '
+         'oil opec dollar yen equities futures earnings recession growth easing hike cut').split()
+
+# Suite regressions must be slower by the tolerance and by at least this much
+MIN_REGRESSION_MS = 0.05
+
+# Zipf-like posting volume: the first account posts most
+AUTHOR_WEIGHTS = [1 / (rank + 1) for rank in range(len(AUTHORS))]
+MARKET_HOURS = (9.5, 16.0)      # two thirds of items land in this local-time window
+
+def synthetic_timestamp(rng, now, days):
+    """A local time within the last `days` days, clustered in market hours"""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=rng.randrange(days))
+    if rng.random() < 0.67:
+        seconds = rng.uniform(*MARKET_HOURS) * 3600
+    else:
+        seconds = rng.uniform(0, 86400)
+    stamp = day + timedelta(seconds=seconds)
+    return stamp if stamp <= now else stamp - timedelta(days=1)
+
+def synthetic_words(rng, characters):
+    """At least one random WORD, and as many as fit in `characters` once joined"""
+    words, size = [], -1
+    while True:
+        word = rng.choice(WORDS)
+        if words and size + len(word) + 1 > characters:
+            return words
+        words.append(word)
+        size += len(word) + 1
+
+def synthetic_tweets(count, seed=42, days=30, now=None):
+    """Deterministic tweet ingest records with production-like distributions
+    
+    A seed always yields the same records at the same offsets from now.
+    Authors follow a Zipf-like curve, text length is lognormal (median
+    about 100 characters, capped at 280), engagement is heavy-tailed and
+    timestamps cluster in market hours.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    for i in range(count):
+        author = rng.choices(AUTHORS, AUTHOR_WEIGHTS)[0]
+        words = synthetic_words(rng, min(280, int(rng.lognormvariate(4.6, 0.5))))
+        if rng.random() < 0.001:
+            words[rng.randrange(len(words))] = rng.choice(RARE_WORDS)
+        likes = int(rng.lognormvariate(3, 1.5))
+        yield {
+            'type': 'tweet',
+            'source_id': f'bench-{seed}-{i}',
+            'author_username': author,
+            'author_name': author,
+            'text': ' '.join(words)[:280],
+            'created_at': synthetic_timestamp(rng, now, days).isoformat(),
+            'likes': likes,
+            'retweets': int(likes * rng.uniform(0.05, 0.4)),
+            'replies': int(likes * rng.uniform(0.01, 0.1)),
+            'sentiment': rng.choices(SENTIMENTS, SENTIMENT_WEIGHTS)[0],
+            'impact': rng.choices(IMPACTS, IMPACT_WEIGHTS)[0],
+            'monetary_policy': rng.uniform(-1, 1),
+            'market_sentiment': rng.uniform(-1, 1),
+            'market_impact': rng.random(),
+            'confidence': rng.betavariate(5, 2),
+            'reasoning': 'Synthetic benchmark record.'
+        }
+
+def fresh_collector(directory, name):
+    return sage.DemoFeedCollector(os.path.join(directory, f'{name}.db'))
+
+def report(label, rows, seconds):
+    print(f'{label:<32} {rows:>9} rows  {seconds:8.3f}s  {rows / seconds:>12,.0f} rows/s')
+
+def bench_ingest(args):
+    """Row-at-a-time inserts versus DemoFeedCollector.ingest_batch"""
+    records = list(synthetic_tweets(args.rows))
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Baseline: one execute + commit per row, like a naive scraper
+        collector = fresh_collector(directory, 'row_commit')
+        statement = collector.upsert_statement('tweets', collector.TWEET_WRITE_FIELDS)
+        rows = [collector.validate_tweet(record) for record in records[:args.commit_rows]]
+        with collector.pool.connection() as conn:
+            start = time.perf_counter()
+            for row in rows:
+                conn.execute(statement, row)
+                conn.commit()
+            report('execute + commit per row', len(rows), time.perf_counter() - start)
+
+        # Row-at-a-time inside a single transaction (populate_sample_data style)
+        collector = fresh_collector(directory, 'row_txn')
+        with collector.pool.connection() as conn:
+            start = time.perf_counter()
+            for record in records:
+                conn.execute(statement, collector.validate_tweet(record))
+            conn.commit()
+            report('execute per row, one txn', len(records), time.perf_counter() - start)
+
+        # Batched executemany through the ingest API
+        collector = fresh_collector(directory, 'batched')
+        start = time.perf_counter()
+        for offset in range(0, len(records), sage.INGEST_BATCH_SIZE):
+            collector.ingest_batch(records[offset:offset + sage.INGEST_BATCH_SIZE])
+        report(f'ingest_batch ({sage.INGEST_BATCH_SIZE}/txn)', len(records), time.perf_counter() - start)
+
+def load_tweets(collector, rows):
+    """Bulk load synthetic tweets, returning the load time"""
+    start = time.perf_counter()
+    batch = []
+    for record in synthetic_tweets(rows):
+        batch.append(record)
+        if len(batch) == sage.INGEST_BATCH_SIZE:
+            collector.ingest_batch(batch)
+            batch = []
+    if batch:
+        collector.ingest_batch(batch)
+    return time.perf_counter() - start
+
+def time_query(func, repeat):
+    """Mean seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def bench_search(args):
+    """FTS5 ranked search versus the LIKE fallback, first page of 20"""
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'search')
+        report('load (with FTS triggers)', args.rows, load_tweets(collector, args.rows))
+
+        print(f'{"query":<16} {"fts5 ms":>10} {"like ms":>10} {"speedup":>9}')
+        for query in ('stagflation', 'taper', 'powell opec', 'infl'):
+            collector.fts_enabled = True
+            fts = time_query(lambda: collector.search(query, 'twitter', 20), args.repeat)
+            collector.fts_enabled = False
+            like = time_query(lambda: collector.search(query, 'twitter', 20), args.repeat)
+            print(f'{query:<16} {fts * 1000:>10.2f} {like * 1000:>10.2f} {like / fts:>8.1f}x')
+
+def legacy_tweet_dict(row):
+    """The per-row dict the feed built before FeedItem, including its timestamp formatting"""
+    item = {
+        'type': 'tweet',
+        'id': f'tweet_{row[0]}',
+        'author': row[1],
+        'author_name': row[2],
+        'content': row[3],
+        'timestamp': row[4],
+        'likes': row[5],
+        'retweets': row[6],
+        'sentiment': row[7],
+        'impact': row[8],
+        'source': 'Twitter'
+    }
+    dt = datetime.fromisoformat(item['timestamp'])
+    age = datetime.now() - dt
+    item['time_ago'] = f'{age.days} days ago'
+    item['formatted_time'] = dt.strftime(sage.DISPLAY_TIME_FORMAT)
+    return item
+
+def measure(label, build, serialize):
+    """Build time and peak memory of a response's items, then its serialization time"""
+    start = time.perf_counter()
+    items = build()
+    built = time.perf_counter()
+    body = serialize(items)
+    dumped = time.perf_counter()
+    del items
+
+    # Memory is traced in a second pass; tracing distorts the timings above
+    tracemalloc.start()
+    items = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{label:<30} build {(built - start) * 1000:7.1f} ms  peak {peak / 1e6:6.1f} MB  '
+          f'serialize {(dumped - built) * 1000:7.1f} ms  body {len(body) / 1e6:5.1f} MB')
+
+def bench_items(args):
+    """Per-row dicts + json versus slotted FeedItems + dumps_json"""
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'items')
+        load_tweets(collector, args.rows)
+        with collector.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {collector.TWEET_ITEM_COLUMNS} FROM tweets').fetchall()
+
+    measure('dict rows + json.dumps', lambda: [legacy_tweet_dict(row) for row in rows],
+            lambda items: json.dumps({'items': items}))
+    measure(f'FeedItem + dumps_json ({"orjson" if sage.orjson else "json"})',
+            lambda: [sage.TweetItem.from_row(row) for row in rows],
+            lambda items: sage.dumps_json({'items': items}))
+
+def first_byte(label, body):
+    """Time to first chunk, total time and peak traced memory of a response body"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = iter(body())
+    size = len(next(chunks))
+    first = time.perf_counter()
+    for chunk in chunks:
+        size += len(chunk)
+    done = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f'{label:<30} first byte {(first - start) * 1000:8.1f} ms  total {(done - start) * 1000:8.1f} ms  '
+          f'peak {peak / 1e6:6.1f} MB  body {size / 1e6:5.1f} MB')
+
+def bench_export(args):
+    """Buffered feed page versus the streamed /api/feed and /api/export bodies"""
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'export')
+        load_tweets(collector, args.rows)
+        
+        def buffered():
+            page = collector.query_feed_page('all', args.rows)
+            return [sage.dumps_json({'success': True, 'items': [item for _, item in page]})]
+        
+        # stream_json_page reads the collector through the app context, like the routes do
+        with sage.create_app(collector=collector).app_context():
+            first_byte('buffered page + dumps_json', buffered)
+            first_byte('streamed json page',
+                       lambda: sage.stream_json_page(collector.iter_feed('all', None, args.rows + 1), args.rows))
+            first_byte('streamed ndjson export', lambda: sage.stream_ndjson(collector.iter_feed('all')))
+
+def sql_rolling(collector, window, span, step):
+    """Per-point SQL aggregate over the window, the straightforward alternative"""
+    now = time.time()
+    points = [now - span + step * (k + 1) for k in range(int(span // step))]
+    with collector.pool.connection() as conn:
+        for point in points:
+            conn.execute('''
+                SELECT COUNT(*), SUM(confidence), SUM(confidence * monetary_policy),
+                       SUM(sentiment = 'hawkish'), SUM(sentiment = 'dovish')
+                FROM tweets WHERE created_at > ? AND created_at <= ?
+            ''', (datetime.fromtimestamp(point - window).isoformat(),
+                  datetime.fromtimestamp(point).isoformat())).fetchone()
+
+def bench_sentiment(args):
+    """SentimentSeries load, rolling analytics and incremental append"""
+    window, span, step = (hours * 3600 for hours in (sage.ANALYTICS_WINDOW_HOURS,
+                                                       sage.ANALYTICS_SPAN_HOURS,
+                                                       sage.ANALYTICS_STEP_HOURS))
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'sentiment')
+        report('load', args.rows, load_tweets(collector, args.rows))
+        
+        engines = [('array', None)] + ([('numpy', sage.numpy)] if sage.numpy else [])
+        for engine, module in engines:
+            sage.numpy = module
+            series = collector.sentiment
+            start = time.perf_counter()
+            series.load()
+            print(f'[{engine}] load arrays          {(time.perf_counter() - start) * 1000:9.1f} ms')
+            analyze = time_query(lambda: series.analyze(window, span, step), args.repeat)
+            print(f'[{engine}] analyze (default)    {analyze * 1000:9.1f} ms')
+        
+        records = list(synthetic_tweets(1000, seed=7))
+        for record in records:
+            record['created_at'] = datetime.now().isoformat()
+        collector.ingest_batch(records)
+        start = time.perf_counter()
+        collector.sentiment.analyze(window, span, step)
+        print(f'append 1000 + analyze             {(time.perf_counter() - start) * 1000:9.1f} ms')
+        
+        # Backdated tweets and re-ingested ones are applied in place, not reloaded
+        for label, records in (('100 late', synthetic_tweets(100, seed=8)),
+                               ('re-ingest 100', synthetic_tweets(100))):
+            collector.ingest_batch(list(records))
+            collector.sentiment.invalidate()
+            start = time.perf_counter()
+            collector.sentiment.analyze(window, span, step)
+            print(f'{label + " + analyze":<34}{(time.perf_counter() - start) * 1000:9.1f} ms')
+        
+        sql = time_query(lambda: sql_rolling(collector, window, span, step), 1)
+        print(f'per-point SQL aggregates          {sql * 1000:9.1f} ms')
+
+def synthetic_html(rng, paragraphs):
+    """Newsletter-style HTML: styled paragraphs with the odd link"""
+    parts = []
+    for k in range(paragraphs):
+        text = ' '.join(synthetic_words(rng, rng.randint(200, 600)))
+        if k % 5 == 4:
+            text += f' <a href="https://example.com/{rng.choice(WORDS)}/{k}">Read more</a>'
+        parts.append(f'<p style="margin: 0 0 12px; line-height: 1.5">{text}</p>')
+    return f'<div style="font-family: Arial, sans-serif; max-width: 640px">{"".join(parts)}</div>'
+
+def synthetic_emails(count, seed=42, days=30, now=None):
+    """Deterministic newsletter email records with production-like body sizes
+    
+    HTML bodies are lognormal in size (median about 10 KB, a long tail).
+    Most emails repeat one of 25 editions, as newsletters do, and 30%
+    carry a personalised footer.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    editions = [synthetic_html(rng, max(1, min(300, int(rng.lognormvariate(3.0, 0.8)))))
+                for _ in range(25)]
+    for i in range(count):
+        html = rng.choice(editions)
+        if rng.random() < 0.3:
+            html += f'<p>Personalised for subscriber {i}</p>'
+        attachments = []
+        if rng.random() < 0.1:
+            attachments.append({'filename': f'report_{i}.pdf', 'size': int(rng.lognormvariate(13, 1))})
+        yield {
+            'type': 'email',
+            'message_id': f'bench-{seed}-{i}',
+            'sender': rng.choices(AUTHORS, AUTHOR_WEIGHTS)[0],
+            'subject': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))),
+            'preview': ' '.join(rng.choice(WORDS) for _ in range(20)),
+            'content': ' '.join(synthetic_words(rng, int(rng.lognormvariate(6.5, 0.6)))),
+            'html_content': html,
+            'received_at': synthetic_timestamp(rng, now, days).isoformat(),
+            'category': rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            'attachments': attachments,
+            'links': [f'https://example.com/{rng.choice(WORDS)}' for _ in range(rng.randint(0, 5))]
+        }
+
+def file_size(collector):
+    with collector.pool.connection() as conn:
+        conn.execute('VACUUM')
+        return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+
+def bench_emails(args):
+    """Inline html_content versus compressed, deduplicated email_bodies"""
+    records = list(synthetic_emails(args.rows))
+    with tempfile.TemporaryDirectory() as directory:
+        # Before: HTML inline in the emails table, written through the old column list
+        inline = fresh_collector(directory, 'inline')
+        fields = inline.EMAIL_INGEST_FIELDS + ('epoch', 'formatted_time')
+        html_index = fields.index('html_content')
+        rows = []
+        for record in records:
+            row, _ = inline.validate_email(record)
+            rows.append(row[:html_index] + (record['html_content'],) + row[html_index + 1:])
+        with inline.pool.connection() as conn:
+            with conn:
+                conn.executemany(inline.upsert_statement('emails', fields), rows)
+        
+        stored = fresh_collector(directory, 'bodies')
+        for offset in range(0, len(records), sage.INGEST_BATCH_SIZE):
+            stored.ingest_batch(records[offset:offset + sage.INGEST_BATCH_SIZE])
+        
+        print(f'{"layout":<22} {"db size":>10} {"list scan":>11} {"detail x100":>12}')
+        sample = [f'email_{i}' for i in range(1, args.rows, max(1, args.rows // 100))]
+        for label, collector in (('inline html_content', inline), ('email_bodies (zlib)', stored)):
+            size = file_size(collector)
+            
+            def scan():
+                with collector.pool.connection() as conn:
+                    for _ in collector.get_email_items(conn):
+                        pass
+            
+            def details():
+                collector.detail_cache.entries.clear()
+                collector.get_details(sample)
+            
+            print(f'{label:<22} {size / 1e6:>8.1f}MB {time_query(scan, args.repeat) * 1000:>9.1f}ms '
+                  f'{time_query(details, args.repeat) * 1000:>10.1f}ms')
+
+class DelayedSource(sage.FeedSource):
+    """Wraps a source with a fixed delay per page, standing in for a remote API"""
+    
+    def __init__(self, inner, delay, timeout=sage.SOURCE_TIMEOUT_SECONDS):
+        super().__init__(inner.item_type, timeout)
+        self.inner = inner
+        self.delay = delay
+    
+    def iter_items(self, cursor=None, newer=False):
+        time.sleep(self.delay)
+        yield from self.inner.iter_items(cursor, newer)
+
+def sequential_page(sources, limit):
+    """One source after another, as get_unified_feed read them before the fan-out"""
+    pages = [source.fetch_page(None, limit + 1) for source in sources]
+    return list(sage.islice(sage.heapq.merge(*pages, key=sage.itemgetter(0), reverse=True), limit + 1))
+
+def bench_sources(args):
+    """Sequential versus concurrent source fetches for an uncached /api/feed page"""
+    records = list(synthetic_emails(args.rows // 10))
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'sources')
+        load_tweets(collector, args.rows)
+        for offset in range(0, len(records), sage.INGEST_BATCH_SIZE):
+            collector.ingest_batch(records[offset:offset + sage.INGEST_BATCH_SIZE])
+        
+        local = collector.feed_sources('all')
+        delay = args.latency_ms / 1000
+        delayed = [DelayedSource(source, delay) for source in local]
+        slow = [delayed[0], DelayedSource(local[1], delay * 10, timeout=delay * 2)]
+        
+        print(f'{"sources":<34} {"sequential ms":>14} {"fan-out ms":>11} {"degraded":>9}')
+        for label, sources in (('sqlite (tweets + emails)', local),
+                               (f'+{args.latency_ms}ms each', delayed),
+                               (f'emails {args.latency_ms * 10}ms, timeout {args.latency_ms * 2}ms', slow)):
+            sequential = time_query(lambda: sequential_page(sources, args.limit), args.repeat)
+            fanned = time_query(lambda: collector.fan_out(sources, args.limit + 1), args.repeat)
+            degraded = collector.fan_out(sources, args.limit + 1)[1]
+            print(f'{label:<34} {sequential * 1000:>14.2f} {fanned * 1000:>11.2f} {",".join(degraded) or "-":>9}')
+
+def load_records(collector, records):
+    """Ingest records in INGEST_BATCH_SIZE batches, returning seconds per 1000 rows for each batch"""
+    samples = []
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == sage.INGEST_BATCH_SIZE:
+            start = time.perf_counter()
+            collector.ingest_batch(batch)
+            samples.append((time.perf_counter() - start) * 1000 / len(batch))
+            batch = []
+    if batch:
+        start = time.perf_counter()
+        collector.ingest_batch(batch)
+        samples.append((time.perf_counter() - start) * 1000 / len(batch))
+    return samples
+
+def bench_generate(args):
+    """Write a synthetic corpus to a database the app can serve through SAGE_DB_PATH"""
+    if os.path.exists(args.db):
+        raise SystemExit(f'{args.db} already exists')
+    collector = sage.DemoFeedCollector(args.db)
+    for label, rows, records in (('tweets', args.tweets, synthetic_tweets(args.tweets, args.seed, args.days)),
+                                 ('emails', args.emails, synthetic_emails(args.emails, args.seed, args.days))):
+        start = time.perf_counter()
+        load_records(collector, records)
+        report(f'generate {label}', rows, time.perf_counter() - start)
+    print(f'{args.db}: {file_size(collector) / 1e6:.1f} MB')
+
+def summarize(samples):
+    """Median and p95 of per-call seconds, in milliseconds"""
+    samples = sorted(samples)
+    return {'median_ms': round(samples[len(samples) // 2] * 1000, 4),
+            'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4)}
+
+def sample_calls(func, repeat, warmup=2):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def suite_cases(collector, client, seed):
+    """Case name -> zero-argument callable, one per benchmarked read path"""
+    rng = random.Random(seed)
+    with collector.pool.connection() as conn:
+        tweet_ids = [f'tweet_{row[0]}' for row in conn.execute('SELECT id FROM tweets')]
+        email_ids = [f'email_{row[0]}' for row in conn.execute('SELECT id FROM emails')]
+        middle = conn.execute('SELECT created_at FROM tweets ORDER BY created_at LIMIT 1 OFFSET ?',
+                              (len(tweet_ids) // 2,)).fetchone()[0]
+    deep_cursor = collector.decode_cursor(middle)
+    since = (datetime.now() - timedelta(hours=24)).isoformat()
+    items = [item for _, item in collector.query_feed_page('all', 999)]
+    
+    def paginate():
+        cursor = None
+        for _ in range(20):
+            page = collector.get_unified_feed('all', 100, cursor)
+            cursor = collector.decode_cursor(page['older_cursor'])
+    
+    def details(ids, count, cold=True):
+        def run():
+            if cold:
+                collector.detail_cache.entries.clear()
+            collector.get_details(rng.sample(ids, count))
+        return run
+    
+    return {
+        'feed_first_page': lambda: collector.get_unified_feed('all', 100),
+        'feed_first_page_http': lambda: client.get('/api/feed?limit=100').data,
+        'feed_paginate_20x100': paginate,
+        'feed_deep_page': lambda: collector.get_unified_feed('all', 100, deep_cursor),
+        'feed_collapsed_page': lambda: collector.get_unified_feed('all', 100, collapse=True),
+        'filter_time_range_24h': lambda: collector.get_time_range('24h', 'all', 100),
+        'filter_counts': collector.get_time_range_counts,
+        'filter_facets_24h': lambda: collector.get_facets(since),
+        'stats': collector.get_stats,
+        'detail_tweet_cold': details(tweet_ids, 1),
+        'detail_email_cold': details(email_ids, 1),
+        'detail_batch_50_cold': details(tweet_ids + email_ids, 50),
+        'detail_batch_50_warm': details(tweet_ids[:200] + email_ids[:50], 50, cold=False),
+        'search_fts': lambda: collector.search('powell', 'all', 20),
+        'serialize_1000_items': lambda: sage.dumps_json({'items': items})
+    }
+
+def suite_meta(args):
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': f'{platform.machine()} x{os.cpu_count()}',
+        'optional': sorted(name for name in ('orjson', 'numpy', 'brotli') if getattr(sage, name)),
+        'tweets': args.tweets,
+        'emails': args.emails,
+        'seed': args.seed,
+        'repeat': args.repeat
+    }
+
+def compare_results(results, baseline, tolerance):
+    """Print current versus baseline medians, returning the cases that got slower than tolerance"""
+    print(f'\n{"case":<26} {"baseline ms":>12} {"current ms":>11} {"change":>8}')
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'{name:<26} {"-":>12} {current["median_ms"]:>11.3f} {"new":>8}')
+            continue
+        
+        change = current['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        slower = change > tolerance and current['median_ms'] - base['median_ms'] > MIN_REGRESSION_MS
+        if slower:
+            regressions.append(name)
+        print(f'{name:<26} {base["median_ms"]:>12.3f} {current["median_ms"]:>11.3f} {change:>+8.0%}'
+              f'{"  REGRESSION" if slower else ""}')
+    return regressions
+
+def bench_suite(args):
+    """Ingest, feed, filter, detail, search and serialization timings on one corpus"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        collector = fresh_collector(directory, 'suite')
+        for name, records in (('ingest_tweets_per_1k', synthetic_tweets(args.tweets, args.seed)),
+                              ('ingest_emails_per_1k', synthetic_emails(args.emails, args.seed))):
+            results[name] = summarize(load_records(collector, records))
+            print(f'{name:<26} median {results[name]["median_ms"]:>10.3f} ms  p95 {results[name]["p95_ms"]:>10.3f} ms')
+        
+        client = sage.create_app(collector=collector).test_client()
+        for name, func in suite_cases(collector, client, args.seed).items():
+            results[name] = sample_calls(func, args.repeat)
+            print(f'{name:<26} median {results[name]["median_ms"]:>10.3f} ms  p95 {results[name]["p95_ms"]:>10.3f} ms')
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'meta': suite_meta(args), 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f'\nSaved baseline to {args.save}')
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        meta = suite_meta(args)
+        for key in ('tweets', 'emails', 'seed', 'python', 'machine'):
+            if baseline['meta'].get(key) != meta[key]:
+                print(f'⚠️  baseline {key} is {baseline["meta"].get(key)}, this run {meta[key]}')
+        regressions = compare_results(results, baseline['results'], args.tolerance)
+        if regressions:
+            raise SystemExit(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+
+def main():
+    parser = argparse.ArgumentParser(description='SAGE Unified Feed benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='bulk ingest throughput')
+    ingest.add_argument('--rows', type=int, default=20000)
+    ingest.add_argument('--commit-rows', type=int, default=2000,
+                        help='rows for the slow commit-per-row baseline')
+    ingest.set_defaults(func=bench_ingest)
+
+    search = commands.add_parser('search', help='full-text search latency')
+    search.add_argument('--rows', type=int, default=100000)
+    search.add_argument('--repeat', type=int, default=20)
+    search.set_defaults(func=bench_search)
+
+    items = commands.add_parser('items', help='item model memory and serialization')
+    items.add_argument('--rows', type=int, default=100000)
+    items.set_defaults(func=bench_items)
+
+    export = commands.add_parser('export', help='streamed response latency and memory')
+    export.add_argument('--rows', type=int, default=200000)
+    export.set_defaults(func=bench_export)
+    
+    sentiment = commands.add_parser('sentiment', help='rolling sentiment analytics')
+    sentiment.add_argument('--rows', type=int, default=1000000)
+    sentiment.add_argument('--repeat', type=int, default=20)
+    sentiment.set_defaults(func=bench_sentiment)
+    
+    emails = commands.add_parser('emails', help='email body storage size and scan speed')
+    emails.add_argument('--rows', type=int, default=20000)
+    emails.add_argument('--repeat', type=int, default=5)
+    emails.set_defaults(func=bench_emails)
+    
+    sources = commands.add_parser('sources', help='concurrent source fan-out latency')
+    sources.add_argument('--rows', type=int, default=20000)
+    sources.add_argument('--limit', type=int, default=100)
+    sources.add_argument('--latency-ms', type=int, default=20, help='simulated remote latency per page')
+    sources.add_argument('--repeat', type=int, default=20)
+    sources.set_defaults(func=bench_sources)
+    
+    generate = commands.add_parser('generate', help='write a synthetic corpus database')
+    generate.add_argument('--db', required=True)
+    generate.add_argument('--tweets', type=int, default=1000000)
+    generate.add_argument('--emails', type=int, default=100000)
+    generate.add_argument('--days', type=int, default=30)
+    generate.add_argument('--seed', type=int, default=42)
+    generate.set_defaults(func=bench_generate)
+    
+    suite = commands.add_parser('suite', help='benchmark suite with a stored JSON baseline')
+    suite.add_argument('--tweets', type=int, default=200000)
+    suite.add_argument('--emails', type=int, default=20000)
+    suite.add_argument('--seed', type=int, default=42)
+    suite.add_argument('--repeat', type=int, default=30)
+    suite.add_argument('--save', metavar='PATH', help='write the results as a baseline')
+    suite.add_argument('--compare', metavar='PATH', help='compare against a saved baseline')
+    suite.add_argument('--tolerance', type=float, default=0.25,
+                       help='relative slowdown reported as a regression')
+    suite.set_defaults(func=bench_suite)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
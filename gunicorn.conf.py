@@ -0,0 +1,34 @@
+"""
+SAGE Unified Feed - gunicorn settings
+    gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+Every setting can be overridden through the SAGE_* environment variables below.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('SAGE_BIND', '0.0.0.0:5532')
+
+# One process per core; threads serve concurrent requests (and SSE streams) in each.
+# /metrics reports only the worker that answers, so set SAGE_WORKERS=1 for server-wide counters
+workers = int(os.environ.get('SAGE_WORKERS', multiprocessing.cpu_count()))
+worker_class = os.environ.get('SAGE_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('SAGE_THREADS', 8))
+# Each SSE stream holds a thread for as long as it is open: keep half of them for
+# other requests (the app answers streams past the limit with 503 and Retry-After)
+os.environ.setdefault('SAGE_MAX_STREAMS', str(max(1, threads // 2)))
+# Streamed exports hold a thread too: a quarter of them, refused the same way past that
+os.environ.setdefault('SAGE_MAX_EXPORTS', str(max(1, threads // 4)))
+keepalive = int(os.environ.get('SAGE_KEEPALIVE', 5))
+timeout = int(os.environ.get('SAGE_TIMEOUT', 60))
+graceful_timeout = 30
+
+# SAGE_ACCESS_LOG= (empty) turns the access log off
+accesslog = os.environ.get('SAGE_ACCESS_LOG', '-') or None
+
+def on_starting(server):
+    """Create and migrate the database once, before any worker forks"""
+    from app import DEMO_DB_PATH, DemoFeedCollector
+    collector = DemoFeedCollector(os.environ.get('SAGE_DB_PATH', DEMO_DB_PATH))
+    collector.pool.close()
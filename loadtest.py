@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+SAGE Unified Feed - load test against a running server
+Each worker thread keeps one HTTP/1.1 keep-alive connection open
+
+    ./run.sh &
+    python loadtest.py --url http://localhost:5532 --concurrency 1,8,32,64 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+def fetch_ids(url):
+    """Item ids from the first feed page, used by the detail scenarios"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    conn.request('GET', '/api/feed?limit=200')
+    items = json.loads(conn.getresponse().read())['items']
+    conn.close()
+    return [item['id'] for item in items]
+
+def scenarios(ids, gzip):
+    """name -> callable returning (method, path, body, headers) for one request"""
+    headers = {'Accept-Encoding': 'gzip'} if gzip else {}
+    tweets = [item_id for item_id in ids if item_id.startswith('tweet_')] or ids
+    emails = [item_id for item_id in ids if item_id.startswith('email_')] or ids
+    return {
+        'feed': lambda rng: ('GET', '/api/feed?limit=50', None, headers),
+        'tweet': lambda rng: ('GET', f'/api/tweet/{rng.choice(tweets)}', None, headers),
+        'email': lambda rng: ('GET', f'/api/email/{rng.choice(emails)}', None, headers),
+        'items': lambda rng: ('POST', '/api/items', json.dumps({'ids': rng.sample(ids, min(20, len(ids)))}),
+                              {**headers, 'Content-Type': 'application/json'})
+    }
+
+def worker(url, build, deadline, seed, latencies, errors):
+    parts = urlsplit(url)
+    rng = random.Random(seed)
+    conn = None
+    while time.perf_counter() < deadline:
+        method, path, body, headers = build(rng)
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            if conn is not None:
+                conn.close()
+            conn = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def run_level(url, build, concurrency, duration):
+    """Run `concurrency` workers for `duration` seconds; list.append is thread-safe"""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(url, build, deadline, seed, latencies, errors))
+               for seed in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SAGE Unified Feed load test')
+    parser.add_argument('--url', default='http://localhost:5532')
+    parser.add_argument('--concurrency', default='1,8,32,64',
+                        help='comma-separated client counts, run in order')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per level')
+    parser.add_argument('--scenarios', default='feed,tweet,email,items')
+    parser.add_argument('--gzip', action='store_true', help='send Accept-Encoding: gzip')
+    args = parser.parse_args()
+    
+    available = scenarios(fetch_ids(args.url), args.gzip)
+    levels = [int(level) for level in args.concurrency.split(',')]
+    
+    print(f'{"scenario":<8} {"clients":>7} {"requests":>9} {"errors":>7} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8}')
+    for name in args.scenarios.split(','):
+        for concurrency in levels:
+            result = run_level(args.url, available[name], concurrency, args.duration)
+            print(f'{name:<8} {concurrency:>7} {result["requests"]:>9} {result["errors"]:>7} '
+                  f'{result["rps"]:>9.0f} {result["p50_ms"]:>8.2f} {result["p99_ms"]:>8.2f}')
+
+if __name__ == '__main__':
+    main()
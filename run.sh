@@ -13,5 +13,9 @@ fi
 # Activate virtual environment
 source venv/bin/activate
 
-# Run the application
-python app.py
+# Run the application: gunicorn workers when available, else the development server
+if command -v gunicorn &> /dev/null; then
+    exec gunicorn -c gunicorn.conf.py 'app:create_app()'
+else
+    python app.py
+fi